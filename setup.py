@@ -11,7 +11,7 @@ setup(
         "pydantic>=2.5.2",
         "python-dotenv>=1.0.0",
         "pytest>=7.4.3",
-        "pytest-asyncio>=0.21.1",
+        "pytest-asyncio>=0.24.0",
         "pytest-mock>=3.14.0",
         "pytest-cov>=6.0.0"
     ],
@@ -1,20 +1,48 @@
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Callable, Awaitable
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict, field
 import aiosqlite
 import sqlite3
 import json
 import logging
-from pathlib import Path
-import re
+import orjson
 import redis
 import asyncio
+import sys
 
 logger = logging.getLogger(__name__)
 
 SESSION_TIMEOUT = 30 * 60  # 30 minutes in seconds
 
-@dataclass
+# Applied to every cache connection; WAL lets readers run alongside the writer
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",  # 256MB
+    "PRAGMA cache_size=-65536",  # 64MB
+)
+
+# Kept as one constant so every write hits sqlite3's per-connection statement cache
+INSERT_SEQUENCE_SQL = """
+    INSERT OR REPLACE INTO action_sequences 
+    (task_key, actions, success_rate, execution_count, avg_execution_time, metadata, last_used, user_id)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+SQLITE_MAX_VARIABLES = 999  # Lowest bound-parameter limit across SQLite builds
+WRITE_BATCH_SIZE = 100  # Max queued writes committed together
+WRITE_BATCH_WINDOW = 0.005  # Seconds to let concurrent writes join a batch
+POOL_SIZE = 4  # Connections per cache: the writer plus readers
+HOT_CACHE_SIZE = 1024  # Recently stored or read sequences kept in process
+SQLITE_BUSY_TIMEOUT = 30  # Seconds to wait for another process's write lock
+
+# Slotted dataclasses need Python 3.10+
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**_SLOTS)
 class Action:
     """Represents a single browser action"""
     type: str  # navigate, click, type, wait, press
@@ -81,14 +109,80 @@ class ActionSequence:
             'successful_actions': successful_indices
         })
 
+def _as_text(value) -> Optional[str]:
+    """Decode a JSON BLOB column, rows written before the BLOB switch are already TEXT"""
+    return value.decode() if isinstance(value, bytes) else value
+
+class _ConnPool:
+    """Reusable aiosqlite connections to a single database"""
+    
+    def __init__(self, db_path: str, uri: bool,
+                 setup: Callable[[aiosqlite.Connection], Awaitable[None]],
+                 max_size: int = POOL_SIZE):
+        self.db_path = db_path
+        self.uri = uri
+        self.max_size = max_size
+        self._setup = setup
+        self._idle = asyncio.Queue()
+        self._size = 0
+        
+    async def acquire(self) -> aiosqlite.Connection:
+        """Take an idle connection, opening a new one while below max_size"""
+        if self._idle.empty() and self._size < self.max_size:
+            self._size += 1
+            try:
+                # Autocommit mode, writers open their own BEGIN IMMEDIATE transactions
+                conn = await aiosqlite.connect(self.db_path, uri=self.uri, isolation_level=None,
+                                               timeout=SQLITE_BUSY_TIMEOUT)
+                try:
+                    await self._setup(conn)
+                except Exception:
+                    await conn.close()
+                    raise
+            except Exception:
+                self._size -= 1
+                raise
+            return conn
+        return await self._idle.get()
+        
+    def release(self, conn: aiosqlite.Connection) -> None:
+        """Return a connection for reuse"""
+        self._idle.put_nowait(conn)
+        
+    async def close(self) -> None:
+        """Close all idle connections, the pool reopens them on demand"""
+        while not self._idle.empty():
+            conn = self._idle.get_nowait()
+            self._size -= 1
+            await conn.close()
+
 class ActionCache:
     """Caches successful action sequences for reuse"""
     
-    def __init__(self, db_path: str = "action_cache.db", redis_url: str = "redis://localhost:6379"):
+    def __init__(self, db_path: str = "action_cache.db", redis_url: str = "redis://localhost:6379",
+                 wal: bool = True):
         self.db_path = db_path
-        self.db = None  # Initialize db attribute
+        self.wal = wal
+        self.uri = db_path.startswith("file:")
+        self.in_memory = db_path == ":memory:" or "mode=memory" in db_path
+        self.db = None  # Writer connection, taken from the pool on connect()
+        self._keepalive = None  # Holds a shared in-memory database open
         self._init_db()
         
+        # Shared-cache in-memory databases lock whole tables, so they get a single connection
+        self._pool = _ConnPool(db_path, self.uri, self._apply_pragmas,
+                               max_size=1 if self.in_memory else POOL_SIZE)
+        self._connect_lock = asyncio.Lock()
+        self._write_cursor = None  # Reused for every INSERT on the writer connection
+        self._write_lock = asyncio.Lock()  # One open transaction at a time on the writer
+        
+        # In-process LRU of sequences by (user id, task key), read before Redis or SQLite
+        self._hot: OrderedDict = OrderedDict()
+        
+        # Queued writes, committed in batches by a single drainer task
+        self._write_queue = asyncio.Queue()
+        self._drainer = None
+        
         # Initialize Redis connection
         self.redis = redis.Redis.from_url(redis_url, decode_responses=True)
         self.current_session = None
@@ -100,26 +194,30 @@ class ActionCache:
     def _init_db(self):
         """Initialize SQLite database with user and session tracking"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            if self.uri and self.in_memory:
+                # Shared in-memory databases vanish once their last connection closes
+                self._keepalive = sqlite3.connect(self.db_path, uri=True)
+                
+            with sqlite3.connect(self.db_path, uri=self.uri) as conn:
                 # First check if table exists and get its columns
                 cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='action_sequences'")
                 table_exists = cursor.fetchone() is not None
                 
                 if not table_exists:
                     # Create table if it doesn't exist
-                conn.execute("""
+                    conn.execute("""
                         CREATE TABLE action_sequences (
                             task_key TEXT,
                             user_id TEXT,
-                        actions TEXT,
-                        success_rate REAL,
-                        execution_count INTEGER,
-                        avg_execution_time REAL,
-                        metadata TEXT,
+                            actions BLOB,
+                            success_rate REAL,
+                            execution_count INTEGER,
+                            avg_execution_time REAL,
+                            metadata BLOB,
                             last_used TIMESTAMP,
                             PRIMARY KEY (task_key, user_id)
-                    )
-                """)
+                        )
+                    """)
                 else:
                     # Check if user_id column exists
                     cursor = conn.execute("PRAGMA table_info(action_sequences)")
@@ -127,6 +225,9 @@ class ActionCache:
                     if 'user_id' not in columns:
                         # Add user_id column to existing table
                         conn.execute("ALTER TABLE action_sequences ADD COLUMN user_id TEXT DEFAULT 'default_user'")
+                
+                # Lets cleanup() range-scan old rows instead of scanning the table
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_action_sequences_last_used ON action_sequences(last_used)")
                     
                 conn.commit()
                 logger.info("Cache database initialized successfully")
@@ -134,16 +235,73 @@ class ActionCache:
             logger.error(f"Failed to initialize cache database: {str(e)}")
             raise
             
+    async def _apply_pragmas(self, conn: aiosqlite.Connection) -> None:
+        """Tune a fresh connection for the cache's write-heavy workload"""
+        if not self.wal or self.in_memory:
+            return
+        for pragma in SQLITE_PRAGMAS:
+            await conn.execute(pragma)
+
     async def connect(self):
         """Establish database connection"""
         try:
-            if not self.db:
-                self.db = await aiosqlite.connect(self.db_path)
+            async with self._connect_lock:
+                if not self.db:
+                    self.db = await self._pool.acquire()
+                    self._write_cursor = await self.db.cursor()
             return self.db
         except Exception as e:
             logger.error(f"Failed to connect to database: {str(e)}")
             return None
 
+    async def _disconnect(self) -> None:
+        """Return the writer connection and close pooled connections"""
+        if self.db:
+            await self._write_cursor.close()
+            self._write_cursor = None
+            self._pool.release(self.db)
+            self.db = None
+        await self._pool.close()
+
+    @asynccontextmanager
+    async def _transaction(self):
+        """Run writes in one BEGIN IMMEDIATE transaction on the writer connection"""
+        await self.connect()
+        async with self._write_lock:
+            # Take the write lock up front instead of upgrading mid-transaction
+            await self._write_cursor.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._write_cursor
+            except BaseException:
+                await self._write_cursor.execute("ROLLBACK")
+                raise
+            await self._write_cursor.execute("COMMIT")
+
+    @asynccontextmanager
+    async def _reader(self):
+        """Borrow a pooled connection for reads, sharing the writer when the pool has no spare"""
+        if self._pool.max_size == 1:
+            # Don't read through the writer while it holds an open transaction
+            db = await self.connect()
+            async with self._write_lock:
+                yield db
+            return
+            
+        conn = await self._pool.acquire()
+        try:
+            yield conn
+        finally:
+            self._pool.release(conn)
+
+    async def __aenter__(self):
+        """Connect on entering an async with block"""
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Release cache resources on leaving the block"""
+        await self.close()
+
     async def start_session(self, user_id: str) -> None:
         """Start a new session for a user"""
         try:
@@ -175,8 +333,8 @@ class ActionCache:
                 task_key, actions_json, metadata_json = row
                 cache_key = f"sequence:{user_id}:{task_key}"
                 data = {
-                    'actions': actions_json,
-                    'metadata': metadata_json
+                    'actions': _as_text(actions_json),
+                    'metadata': _as_text(metadata_json)
                 }
                 self.redis.set(cache_key, json.dumps(data), ex=SESSION_TIMEOUT)
                 
@@ -285,11 +443,29 @@ class ActionCache:
         except Exception as e:
             logger.error(f"Failed to store sequence with results: {str(e)}")
 
+    def _remember(self, sequence: ActionSequence) -> None:
+        """Keep a sequence in the hot cache, evicting the least recently used"""
+        key = (self.current_user_id, sequence.task_key)
+        self._hot[key] = sequence
+        self._hot.move_to_end(key)
+        if len(self._hot) > HOT_CACHE_SIZE:
+            self._hot.popitem(last=False)
+
+    def _forget(self, task_key: str) -> None:
+        """Drop a task's sequence for the current user from the hot cache"""
+        self._hot.pop((self.current_user_id, task_key), None)
+
     async def get_similar_task(self, task: str) -> Optional[ActionSequence]:
         """Get similar task using semantic search in Redis, falling back to SQLite"""
         if not self.current_user_id:
             return None
             
+        key = (self.current_user_id, task)
+        sequence = self._hot.get(key)
+        if sequence is not None and sequence.success_rate >= 0.8:
+            self._hot.move_to_end(key)
+            return sequence
+            
         try:
             # Extend session timeout
             await self.extend_session()
@@ -387,10 +563,13 @@ class ActionCache:
     async def end_session(self) -> None:
         """End current session and persist final state to SQLite"""
         if self.current_user_id:
+            # The session's sequences are rewritten below, drop the in-process copies
+            for key in [key for key in self._hot if key[0] == self.current_user_id]:
+                del self._hot[key]
+                
             try:
                 # Ensure we have a valid DB connection
-                if not self.db:
-                    self.db = await aiosqlite.connect(self.db_path)
+                await self.connect()
                 
                 # Get all sequences for current user from Redis
                 pattern = f"sequence:{self.current_user_id}:*"
@@ -422,45 +601,69 @@ class ActionCache:
                 self.current_session = None
                 
                 # Close DB connection
-                if self.db:
-                    await self.db.close()
-                    self.db = None
+                await self._disconnect()
                     
             except Exception as e:
                 logger.error(f"Failed to end session: {str(e)}")
                 # Ensure DB connection is closed even on error
-                if self.db:
-                    await self.db.close()
-                    self.db = None
+                await self._disconnect()
             
+    @staticmethod
+    def sequence_row(task_key: str, actions: List, success_rate: float = 0.0,
+                     execution_count: int = 0, avg_execution_time: float = 0.0,
+                     metadata: Dict = None, last_used: datetime = None) -> tuple:
+        """Build an action_sequences row from Action instances or plain action dicts"""
+        return (
+            task_key,
+            orjson.dumps(actions),
+            success_rate,
+            execution_count,
+            avg_execution_time,
+            orjson.dumps(metadata or {}, option=orjson.OPT_NON_STR_KEYS),
+            (last_used or datetime.now()).isoformat()
+        )
+
+    def _sequence_row(self, sequence: ActionSequence) -> tuple:
+        """Convert a sequence to an action_sequences row"""
+        return self.sequence_row(
+            sequence.task_key,
+            sequence.actions,  # orjson serializes the dataclasses natively
+            sequence.success_rate,
+            sequence.execution_count,
+            sequence.avg_execution_time,
+            sequence.metadata,
+            sequence.last_used
+        )
+
     async def store(self, sequence: ActionSequence) -> None:
         """Store an action sequence in the cache"""
         try:
-            # Convert actions to JSON string
-            actions_json = json.dumps([asdict(action) for action in sequence.actions])
-            
             # Insert or update sequence using aiosqlite
-            db = await self.connect()
-                await db.execute(
-                    """
-                    INSERT OR REPLACE INTO action_sequences 
-                    (task_key, actions, success_rate, execution_count, avg_execution_time, metadata, last_used)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        sequence.task_key,
-                        actions_json,
-                        sequence.success_rate,
-                        sequence.execution_count,
-                        sequence.avg_execution_time,
-                        json.dumps(sequence.metadata),
-                        sequence.last_used.isoformat()
-                    )
-                )
-                await db.commit()
+            async with self._transaction() as cursor:
+                await cursor.execute(INSERT_SEQUENCE_SQL, (*self._sequence_row(sequence), self.current_user_id))
+            self._remember(sequence)
         except Exception as e:
             logger.error(f"Failed to store sequence: {e}")
             raise
+
+    async def store_many(self, sequences: List[ActionSequence]) -> None:
+        """Store several action sequences in a single transaction"""
+        await self.store_raw([self._sequence_row(sequence) for sequence in sequences])
+        for sequence in sequences:
+            self._remember(sequence)
+
+    async def store_raw(self, rows: List[tuple]) -> None:
+        """Store prebuilt sequence_row() rows for the current user in a single transaction"""
+        try:
+            user_id = self.current_user_id
+            for row in rows:
+                self._forget(row[0])
+                
+            async with self._transaction() as cursor:
+                await cursor.executemany(INSERT_SEQUENCE_SQL, [(*row, user_id) for row in rows])
+        except Exception as e:
+            logger.error(f"Failed to store sequences: {e}")
+            raise
             
     def _normalize_task(self, task: str) -> str:
         """Normalize task description for better matching"""
@@ -542,6 +745,83 @@ class ActionCache:
             self.task_aliases[normalized_task] = set()
         self.task_aliases[normalized_task].add(task)
 
+    async def store_queued(self, sequence: ActionSequence) -> None:
+        """Queue a sequence for the next batched write and wait until it is committed"""
+        if self._drainer is None or self._drainer.done():
+            self._drainer = asyncio.create_task(self._drain_writes())
+        
+        committed = asyncio.get_running_loop().create_future()
+        await self._write_queue.put(((*self._sequence_row(sequence), self.current_user_id), committed))
+        await committed
+        self._remember(sequence)
+
+    async def _drain_writes(self) -> None:
+        """Commit queued writes in batches until a None sentinel is dequeued"""
+        stopping = False
+        while not stopping:
+            item = await self._write_queue.get()
+            if item is None:
+                return
+            batch = [item]
+            await asyncio.sleep(WRITE_BATCH_WINDOW)
+            while len(batch) < WRITE_BATCH_SIZE and not self._write_queue.empty():
+                item = self._write_queue.get_nowait()
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+                
+            try:
+                async with self._transaction() as cursor:
+                    await cursor.executemany(INSERT_SEQUENCE_SQL, [row for row, _ in batch])
+                for _, committed in batch:
+                    if not committed.done():
+                        committed.set_result(None)
+            except Exception as e:
+                logger.error(f"Failed to store queued sequences: {str(e)}")
+                for _, committed in batch:
+                    if not committed.done():
+                        committed.set_exception(e)
+
+    async def get_similar_tasks(self, keys: List[str]) -> Dict[str, ActionSequence]:
+        """Get stored sequences for many task keys in as few queries as possible"""
+        try:
+            user_id = self.current_user_id
+            results = {key: self._hot[user_id, key] for key in keys if (user_id, key) in self._hot}
+            misses = [key for key in keys if key not in results]
+            if not misses:
+                return results
+                
+            async with self._reader() as db:
+                # One variable per chunk goes to the user id
+                for start in range(0, len(misses), SQLITE_MAX_VARIABLES - 1):
+                    chunk = misses[start:start + SQLITE_MAX_VARIABLES - 1]
+                    placeholders = ",".join("?" * len(chunk))
+                    cursor = await db.execute(
+                        f"""
+                        SELECT task_key, actions, success_rate, execution_count,
+                               avg_execution_time, metadata, last_used
+                        FROM action_sequences WHERE task_key IN ({placeholders}) AND user_id IS ?
+                        """,
+                        (*chunk, user_id)
+                    )
+                    for row in await cursor.fetchall():
+                        results[row[0]] = ActionSequence(
+                            task_key=row[0],
+                            actions=[Action(**a) for a in orjson.loads(row[1])],
+                            success_rate=row[2],
+                            execution_count=row[3],
+                            avg_execution_time=row[4],
+                            metadata=orjson.loads(row[5]) if row[5] else {},
+                            last_used=datetime.fromisoformat(row[6])
+                        )
+                        self._remember(results[row[0]])
+            return results
+            
+        except Exception as e:
+            logger.error(f"Failed to get similar tasks: {str(e)}")
+            return {}
+
     async def _get_similar_task_from_db(self, task: str) -> Optional[ActionSequence]:
         """Get a similar task from the database"""
         try:
@@ -549,18 +829,19 @@ class ActionCache:
             task = task.lower().strip()
             
             # First try exact match
-            cursor = await self.db.execute(
-                "SELECT task_key, actions, metadata FROM action_sequences"
-            )
-            rows = await cursor.fetchall()
+            async with self._reader() as db:
+                cursor = await db.execute(
+                    "SELECT task_key, actions, metadata FROM action_sequences"
+                )
+                rows = await cursor.fetchall()
             
             best_match = None
             best_score = 0
             
             for row in rows:
                 cached_task = row[0].lower().strip()
-                cached_actions = json.loads(row[1])
-                metadata = json.loads(row[2]) if row[2] else {}
+                cached_actions = orjson.loads(row[1])
+                metadata = orjson.loads(row[2]) if row[2] else {}
                 
                 # Calculate similarity score
                 score = self._calculate_task_similarity(task, cached_task, cached_actions)
@@ -608,27 +889,33 @@ class ActionCache:
         # Calculate final score - verb matching is critical
         return word_score * verb_score if verb_score > 0 else 0.0
 
-    async def update_stats(self, task: str, old_success_rate: float, success: bool) -> None:
-        """Update sequence statistics"""
-        normalized_task = self._normalize_task(task)
-        if normalized_task in self.sequences:
-            sequence = self.sequences[normalized_task]
-            sequence.execution_count += 1
-            if success:
-                sequence.success_rate = (sequence.success_rate * (sequence.execution_count - 1) + 1) / sequence.execution_count
-            
-            # If success rate improves significantly, make this the canonical sequence
-            if sequence.success_rate > old_success_rate + 0.2:  # 20% improvement threshold
-                for alias in self.task_aliases.get(normalized_task, set()):
-                    if alias != task:
-                        self.sequences[self._normalize_task(alias)] = sequence
+    async def update_stats(self, task: str, execution_time: float, success: bool) -> None:
+        """Fold one execution into a stored sequence's running statistics"""
+        try:
+            self._forget(task)
+            async with self._transaction() as cursor:
+                # Right-hand sides see the pre-update row, so the averages use the old count
+                await cursor.execute(
+                    """
+                    UPDATE action_sequences
+                    SET success_rate = (success_rate * execution_count + ?) / (execution_count + 1),
+                        avg_execution_time = (avg_execution_time * execution_count + ?) / (execution_count + 1),
+                        execution_count = execution_count + 1,
+                        last_used = ?
+                    WHERE task_key = ? AND user_id IS ?
+                    """,
+                    (1.0 if success else 0.0, execution_time, datetime.now().isoformat(), task,
+                     self.current_user_id)
+                )
+        except Exception as e:
+            logger.error(f"Failed to update sequence stats: {str(e)}")
             
     async def clear(self):
         """Clear all cached sequences"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("DELETE FROM action_sequences")
-                await db.commit()
+            self._hot.clear()
+            async with self._transaction() as cursor:
+                await cursor.execute("DELETE FROM action_sequences")
                 
         except Exception as e:
             logger.error(f"Failed to clear cache: {str(e)}")
@@ -636,7 +923,7 @@ class ActionCache:
     async def get_stats(self) -> Dict:
         """Get cache statistics"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._reader() as db:
                 async with db.execute(
                     """
                     SELECT COUNT(*) as total,
@@ -662,11 +949,23 @@ class ActionCache:
     async def close(self):
         """Clean up resources"""
         try:
-            if self.db:
-                await self.db.close()
+            if self._drainer:
+                if not self._drainer.done():
+                    # Let queued writes commit so store_queued callers return
+                    self._write_queue.put_nowait(None)
+                    await self._drainer
+                self._drainer = None
+            while not self._write_queue.empty():
+                item = self._write_queue.get_nowait()
+                if item and not item[1].done():
+                    item[1].set_exception(RuntimeError("Action cache closed before the write was committed"))
             if self.redis:
                 await self.end_session()
                 self.redis.close()
+            await self._disconnect()
+            if self._keepalive:
+                self._keepalive.close()
+                self._keepalive = None
             logger.info("Cache resources cleaned up successfully")
         except Exception as e:
             logger.error(f"Error during cache cleanup: {str(e)}")
@@ -675,15 +974,17 @@ class ActionCache:
         """Remove old entries from the cache"""
         try:
             cutoff_date = (datetime.now() - timedelta(days=max_age_days)).isoformat()
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute(
+            for key in [key for key, sequence in self._hot.items() if sequence.last_used.isoformat() < cutoff_date]:
+                del self._hot[key]
+                
+            async with self._transaction() as cursor:
+                await cursor.execute(
                     """
                     DELETE FROM action_sequences
                     WHERE last_used < ?
                     """, 
                     (cutoff_date,)
                 )
-                await db.commit()
             logger.info(f"Cleaned up action cache (removed entries older than {max_age_days} days)")
         except Exception as e:
             logger.error(f"Failed to cleanup cache: {str(e)}")
@@ -717,10 +1018,6 @@ class ActionCache:
             return
         
         try:
-            # Ensure we have a DB connection
-            if not self.db:
-                self.db = await aiosqlite.connect(self.db_path)
-            
             # Convert action success rates and partial successes to JSON
             metadata = {
                 'action_success_rates': sequence.action_success_rates,
@@ -744,8 +1041,8 @@ class ActionCache:
             
             metadata.update(sequence.metadata)
             
-            # Convert actions to JSON using to_dict method
-            actions_json = json.dumps([action.to_dict() for action in sequence.actions])
+            # Serialize actions, orjson handles the dataclasses directly
+            actions_json = orjson.dumps(sequence.actions)
             
             # Ensure last_used is a valid timestamp string
             last_used = sequence.last_used
@@ -757,23 +1054,21 @@ class ActionCache:
                 last_used_str = datetime.now().isoformat()
             
             # Store in database
-            await self.db.execute(
-                """
-                INSERT OR REPLACE INTO action_sequences 
-                (task_key, actions, success_rate, execution_count, avg_execution_time, metadata, last_used)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    sequence.task_key,
-                    actions_json,
-                    sequence.success_rate,
-                    sequence.execution_count,
-                    sequence.avg_execution_time,
-                    json.dumps(metadata),
-                    last_used_str
+            self._forget(sequence.task_key)
+            async with self._transaction() as cursor:
+                await cursor.execute(
+                    INSERT_SEQUENCE_SQL,
+                    (
+                        sequence.task_key,
+                        actions_json,
+                        sequence.success_rate,
+                        sequence.execution_count,
+                        sequence.avg_execution_time,
+                        orjson.dumps(metadata, option=orjson.OPT_NON_STR_KEYS),
+                        last_used_str,
+                        self.current_user_id
+                    )
                 )
-            )
-            await self.db.commit()
             
         except Exception as e:
             logger.error(f"Failed to store sequence in database: {str(e)}")
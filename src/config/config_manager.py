@@ -367,12 +367,26 @@ class ConfigManager:
         self.config = Config()
         self._load_config()
     
+    def _read(self, path: str) -> Optional[Dict]:
+        """Read a JSON config file, None if it doesn't exist"""
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+            
+    def _write(self, path: str, data: Dict):
+        """Write a JSON config file, creating its directory"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+    
     def _load_config(self):
         """Load configuration from file"""
         try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r') as f:
-                    config_data = json.load(f)
+            config_data = self._read(self.config_file)
+            if config_data is not None:
                 # Validate config data before assigning
                 self.config = Config.model_validate(config_data)
             else:
@@ -423,15 +437,11 @@ class ConfigManager:
     def save_config(self):
         """Save current configuration to file"""
         try:
-            # Ensure the directory exists
-            os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
-            
             # Convert config to dict, excluding sensitive data
             config_dict = self.config.model_dump(exclude_none=True)
             
             # Write to file
-            with open(self.config_file, 'w') as f:
-                json.dump(config_dict, f, indent=2)
+            self._write(self.config_file, config_dict)
                 
             logger.info(f"Configuration saved to {self.config_file}")
         except Exception as e:
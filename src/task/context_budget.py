@@ -0,0 +1,72 @@
+import logging
+from typing import Any, Callable, Dict, Optional
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_BUDGET_TOKENS = 8000
+CHARS_PER_TOKEN = 4  # Rough average for English text and JSON
+
+def estimate_tokens(obj: Any) -> int:
+    """Approximate token count from compact JSON size"""
+    try:
+        return len(orjson.dumps(obj, default=str)) // CHARS_PER_TOKEN
+    except TypeError:
+        return len(str(obj)) // CHARS_PER_TOKEN
+
+class ContextBudget:
+    """Fit LLM prompt context into a token budget"""
+
+    def __init__(self, max_tokens: int = CONTEXT_BUDGET_TOKENS):
+        self.max_tokens = max_tokens
+
+    def estimate(self, context: Dict) -> Dict[str, int]:
+        """Estimate tokens for each component of the context"""
+        return {key: estimate_tokens(value) for key, value in context.items()}
+
+    def fits(self, context: Dict) -> bool:
+        """Check if context is within budget"""
+        return sum(self.estimate(context).values()) <= self.max_tokens
+
+    def apply(self,
+              context: Dict,
+              strict_gui_state: Optional[Callable[[], Dict]] = None,
+              summarize: Optional[Callable[[Dict], Dict]] = None) -> Dict:
+        """Shrink context in stages, stopping as soon as it fits
+
+        1. Drop the oldest action history entries
+        2. Replace the GUI state with a stricter reduction
+        3. Summarize whatever remains
+        """
+        sizes = self.estimate(context)
+        total = sum(sizes.values())
+        if total <= self.max_tokens:
+            return context
+
+        # 1. Truncate trajectory, oldest first
+        history = list(context.get("action_history") or [])
+        history_sizes = [estimate_tokens(entry) for entry in history]
+        dropped = 0
+        while dropped < len(history) and total > self.max_tokens:
+            total -= history_sizes[dropped]
+            dropped += 1
+        context["action_history"] = history[dropped:]
+        if total <= self.max_tokens:
+            logger.debug(f"Context fits after dropping {dropped} history entries")
+            return context
+
+        # 2. Stricter GUI state reduction
+        if strict_gui_state is not None:
+            context["gui_state"] = strict_gui_state()
+            total = sum(self.estimate(context).values())
+            if total <= self.max_tokens:
+                logger.debug("Context fits after strict GUI state reduction")
+                return context
+
+        # 3. Summarize as a last resort
+        if summarize is not None:
+            logger.debug(f"Context still over budget ({total} tokens), summarizing")
+            context = summarize(context)
+
+        return context
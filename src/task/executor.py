@@ -4,16 +4,97 @@ from dataclasses import dataclass, field
 from datetime import datetime
 import uuid
 import json
+import orjson
 import asyncio
 import hashlib
+import re
 import time
+from functools import lru_cache
+from urllib.parse import urlparse
 
 from src.browser.browser_manager import BrowserManager
 from src.actions.action_cache import ActionCache, ActionSequence, Action
 from src.llm.claude_client import ClaudeClient
+from src.task.context_budget import ContextBudget
 
 logger = logging.getLogger(__name__)
 
+# Element filters used when reducing GUI state for the LLM
+_INTERACTIVE_TAGS = frozenset({'a', 'button', 'input', 'select', 'textarea'})
+_INTERACTIVE_ROLES = frozenset({'button', 'link', 'textbox', 'combobox', 'checkbox', 'radio'})
+_ESSENTIAL_KEYS = (
+    'tag', 'role', 'text', 'id', 'name', 'value',
+    'href', 'src', 'alt', 'title', 'aria-label',
+    'position', 'clickable', 'visible', 'selector'
+)
+
+# Partial-match lookup tables for _find_partial_matches
+_NAVIGATION_PHRASES = ("go to", "navigate to", "open", "visit")
+_NAVIGATION_RE = re.compile("|".join(map(re.escape, _NAVIGATION_PHRASES)))
+_KNOWN_SUBTASKS = {
+    "gbp/usd": ("currency", "pair", "gbp", "usd"),
+    "historical data": ("historical", "history", "past"),
+    "news": ("news", "article", "story"),
+    "technical analysis": ("technical", "analysis", "chart")
+}
+_SUBTASK_KEYWORDS = {
+    word: key for key, keywords in _KNOWN_SUBTASKS.items() for word in keywords
+}
+
+# Context reduction: keep a stable suffix of recent actions so successive
+# prompts share a prefix
+KEEP_RECENT_K = 8
+
+def _json_default(obj):
+    """Fallback encoder for objects orjson cannot serialize natively"""
+    if hasattr(obj, '__dict__'):
+        return obj.__dict__
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+@lru_cache(maxsize=2048)
+def _pattern_id(tag: str, role: str, classes: tuple, pos_bucket: str) -> str:
+    """Pattern ID for an element's tag, role, classes and position bucket"""
+    pattern_parts = []
+    
+    if tag:
+        pattern_parts.append(f"tag:{tag}")
+    if role:
+        pattern_parts.append(f"role:{role}")
+        
+    # Add common UI pattern identifiers
+    lowered = [cls.lower() for cls in classes]
+    if any("btn" in cls for cls in lowered):
+        pattern_parts.append("type:button")
+    elif any("input" in cls for cls in lowered):
+        pattern_parts.append("type:input")
+    elif any("link" in cls for cls in lowered):
+        pattern_parts.append("type:link")
+        
+    # Add position-based pattern
+    horizontal, _, vertical = pos_bucket.partition("|")
+    if horizontal:
+        pattern_parts.append(f"pos:{horizontal}")
+    if vertical:
+        pattern_parts.append(f"pos:{vertical}")
+    
+    return hashlib.md5("|".join(pattern_parts).encode()).hexdigest()[:8]
+
+# scheme://netloc/path followed by only a query or fragment. URLs with
+# whitespace, control characters, ;params or IPv6 hosts don't match and
+# go through urlparse, which strips, splits or validates those.
+_URL_RE = re.compile(r'([A-Za-z][A-Za-z0-9+.\-]*)://([^/?#;\[\]\x00-\x20]*)(/[^?#;\x00-\x20]*)?(?=[?#]|\Z)')
+
+@lru_cache(maxsize=4096)
+def _normalize_url(url: str) -> str:
+    """Reduce a URL to scheme, host and path for comparison"""
+    match = _URL_RE.match(url)
+    if match:
+        return f"{match[1].lower()}://{match[2]}{match[3] or ''}"
+    
+    # Fall back to full parsing for anything the fast path doesn't cover
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+
 @dataclass
 class TaskState:
     """Represents the current state of a task execution"""
@@ -25,6 +106,7 @@ class TaskState:
     last_gui_state: Optional[Dict] = None
     action_history: List[Dict] = field(default_factory=list)
     error: Optional[str] = None
+    started_at: float = field(default_factory=time.monotonic)  # For the cached execution time
 
 class TaskExecutor:
     """Executes user tasks by coordinating browser actions, caching, and LLM planning"""
@@ -35,12 +117,14 @@ class TaskExecutor:
         self.claude = claude
         self.active_tasks = {}  # Store active task states
         self.last_request_time = 0  # Initialize last request time
+        self.context_budget = ContextBudget()
+        self._last_incomplete_hash: Optional[bytes] = None  # GUI state last verified as incomplete
         
     async def check_status(self, task: str, gui_state: dict) -> bool:
         """Verify task completion by asking Claude"""
         try:
             verification_response = await self.claude.plan_actions(
-                f"Verify if the following task was completed successfully: {task}\nCurrent GUI state:\n{json.dumps(gui_state, indent=2)}",
+                f"Verify if the following task was completed successfully: {task}\nCurrent GUI state:\n{orjson.dumps(gui_state, default=str).decode()}",
                 gui_state,
                 action_history=None
             )
@@ -221,7 +305,6 @@ class TaskExecutor:
             # Step 1: Handle Navigation
             if not action_history or not any(r["success"] and r["action"]["type"] == "navigate" for r in action_history):
                 # Check if this is a currency pair request
-                import re
                 pairs_in_request = re.findall(r'([a-zA-Z]{3})[/-]([a-zA-Z]{3})', request.lower())
                 if pairs_in_request:
                     # Use currency pair prompt to construct URL
@@ -270,7 +353,6 @@ class TaskExecutor:
         try:
             # Extract dates from request
             from datetime import datetime
-            import re
             
             # Find dates in various formats
             date_pattern = r'(\d{1,2}[-/]\d{1,2}[-/]\d{2,4}|\d{4}[-/]\d{1,2}[-/]\d{1,2})'
@@ -419,7 +501,7 @@ class TaskExecutor:
         """More accurate token count estimation"""
         try:
             # Rough token estimation rules
-            json_str = json.dumps(context)
+            json_str = json.dumps(context, default=str)
             
             # Count words (roughly 1.3 tokens per word)
             word_count = len(json_str.split()) * 1.3
@@ -537,7 +619,7 @@ class TaskExecutor:
 
     async def _get_human_verification(self, question: str) -> bool:
         """Get human verification and learn from response"""
-        response = input(f"{question} (yes/no): ")
+        response = await self._prompt_user(f"{question} (yes/no): ")
         is_success = response.lower() == 'yes'
         
         if is_success:
@@ -607,7 +689,6 @@ class TaskExecutor:
         """Update verification patterns based on successful state"""
         try:
             # Parse URL to get domain
-            from urllib.parse import urlparse
             domain = urlparse(url).netloc
             
             # Load existing patterns
@@ -654,8 +735,6 @@ class TaskExecutor:
 
     def _url_paths_similar(self, url1: str, url2: str) -> bool:
         """Check if URL paths are similar enough"""
-        from urllib.parse import urlparse
-        
         def get_path_parts(url):
             return urlparse(url).path.strip("/").split("/")
             
@@ -774,54 +853,62 @@ class TaskExecutor:
 
     def _is_interactive_element(self, element: dict) -> bool:
         """Determine if an element is interactive"""
-        interactive_tags = {'a', 'button', 'input', 'select', 'textarea'}
-        interactive_roles = {'button', 'link', 'textbox', 'combobox', 'checkbox', 'radio'}
-        
-        tag = element.get('tag', '').lower()
-        role = element.get('role', '').lower()
-        
-        # Check if element is clickable
-        is_clickable = element.get('clickable', False)
-        has_click_handler = bool(element.get('listeners', {}).get('click'))
+        get = element.get
         
+        # Cheapest checks first - most interactive elements match on tag
         return (
-            tag in interactive_tags or
-            role in interactive_roles or
-            is_clickable or
-            has_click_handler
+            get('tag', '').lower() in _INTERACTIVE_TAGS or
+            get('role', '').lower() in _INTERACTIVE_ROLES or
+            bool(get('clickable', False)) or
+            bool(get('listeners', {}).get('click'))
         )
 
     def _clean_element_data(self, element: dict) -> dict:
         """Remove non-essential data from element"""
-        essential_keys = {
-            'tag', 'role', 'text', 'id', 'name', 'value',
-            'href', 'src', 'alt', 'title', 'aria-label',
-            'position', 'clickable', 'visible', 'selector'
-        }
-        
-        return {k: v for k, v in element.items() if k in essential_keys}
+        # Probe the short key list rather than scanning every DOM attribute
+        return {k: element[k] for k in _ESSENTIAL_KEYS if k in element}
 
     def _reduce_context(self, context: dict) -> dict:
         """Reduce context size while maintaining critical information"""
         try:
+            gui_state = context.get("gui_state", {})
+            
             # Start with a clean reduced context
             reduced = {
                 "task": context["task"],
-                "gui_state": self._reduce_gui_state(context.get("gui_state", {})),
-                "action_history": context.get("action_history", [])[:2]  # Keep only last 2 actions
+                "gui_state": self._reduce_gui_state(gui_state),
+                "action_history": context.get("action_history", [])[-KEEP_RECENT_K:]  # Keep most recent actions
             }
             
-            return reduced
+            return self.context_budget.apply(
+                reduced,
+                strict_gui_state=lambda: self._reduce_gui_state(gui_state, strict=True),
+                summarize=self._truncate_gui_elements
+            )
         except Exception as e:
             logger.error(f"Context reduction failed: {str(e)}")
             return context
 
-    def _reduce_gui_state(self, gui_state: dict) -> dict:
-        """Reduce GUI state size by removing redundant info and using pattern references"""
+    def _truncate_gui_elements(self, context: dict) -> dict:
+        """Halve GUI elements until context fits, keeping those earliest in the page"""
+        elements = (context.get("gui_state") or {}).get("elements")
+        while elements and not self.context_budget.fits(context):
+            del elements[len(elements) // 2:]
+        return context
+
+    def _reduce_gui_state(self, gui_state: dict, strict: bool = False) -> dict:
+        """Reduce GUI state size by removing redundant info and using pattern references
+        
+        In strict mode, hidden elements and elements below the viewport are
+        dropped and only very short text is kept.
+        """
         if not gui_state:
             return {}
             
         try:
+            viewport_height = (gui_state.get("viewport") or {}).get("height") if strict else None
+            max_text_length = 40 if strict else 100
+            
             # Keep base state info but clean elements
             reduced_state = {
                 "url": gui_state.get("url"),
@@ -838,6 +925,13 @@ class TaskExecutor:
                 # Skip non-interactive elements
                 if not self._is_interactive_element(element):
                     continue
+                
+                if strict:
+                    if not element.get("visible", True):
+                        continue
+                    position = element.get("position") or {}
+                    if viewport_height and position.get("y", 0) > viewport_height:
+                        continue
                     
                 # Generate pattern ID for this element
                 pattern_id = self._get_element_pattern_id(element)
@@ -857,8 +951,8 @@ class TaskExecutor:
                 }
                 
                 # Only include text if it's short and meaningful
-                text = element.get("text", "").strip()
-                if text and len(text) < 100 and not text.startswith("data:"):
+                text = (element.get("text") or "").strip()
+                if text and len(text) < max_text_length and not text.startswith("data:"):
                     reduced_element["text"] = text
                 
                 reduced_state["elements"].append(reduced_element)
@@ -872,90 +966,99 @@ class TaskExecutor:
     def _get_element_pattern_id(self, element: dict) -> str:
         """Generate a unique pattern ID for an element based on its characteristics"""
         try:
-            # Extract key characteristics
-            tag = element.get("tag", "").lower()
-            role = element.get("role", "").lower()
-            classes = element.get("class", [])
-            
-            # Build pattern components
-            pattern_parts = []
-            
-            if tag:
-                pattern_parts.append(f"tag:{tag}")
-            if role:
-                pattern_parts.append(f"role:{role}")
-                
-            # Add common UI pattern identifiers
-            if any(cls.lower() for cls in classes if "btn" in cls.lower()):
-                pattern_parts.append("type:button")
-            elif any(cls.lower() for cls in classes if "input" in cls.lower()):
-                pattern_parts.append("type:input")
-            elif any(cls.lower() for cls in classes if "link" in cls.lower()):
-                pattern_parts.append("type:link")
-                
-            # Add position-based pattern
+            classes = element.get("class") or ()
+            if isinstance(classes, str):
+                classes = classes.split()
+            
+            # Bucket position so repeated elements share a cache entry
             position = element.get("position", {})
+            pos_bucket = ""
             if position:
                 x = position.get("x", 0)
                 y = position.get("y", 0)
-                if x < 100:
-                    pattern_parts.append("pos:left")
-                elif x > 500:
-                    pattern_parts.append("pos:right")
-                if y < 100:
-                    pattern_parts.append("pos:top")
-                elif y > 500:
-                    pattern_parts.append("pos:bottom")
-            
-            # Generate unique ID
-            return hashlib.md5("|".join(pattern_parts).encode()).hexdigest()[:8]
+                pos_bucket = (
+                    ("left" if x < 100 else "right" if x > 500 else "") + "|" +
+                    ("top" if y < 100 else "bottom" if y > 500 else "")
+                )
+            
+            return _pattern_id(
+                element.get("tag", "").lower(),
+                element.get("role", "").lower(),
+                tuple(sorted(classes)),
+                pos_bucket
+            )
             
         except Exception:
             return "unknown"
 
     def _urls_match(self, url1: str, url2: str) -> bool:
         """Compare URLs ignoring minor differences"""
-        from urllib.parse import urlparse
-        
-        def normalize_url(url):
-            parsed = urlparse(url)
-            return f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-            
-        return normalize_url(url1) == normalize_url(url2)
+        return _normalize_url(url1) == _normalize_url(url2)
 
     async def _is_task_complete(self, task: str, gui_state: dict, task_state: TaskState) -> bool:
         """Check if task is complete by asking Claude"""
         try:
-            verification = await self.claude.plan_actions(
+            # Skip the LLM call if its input hasn't changed since it last said no
+            prompt = (
                 f"Verify if this task is complete: {task}\n"
-                f"Current GUI state:\n{json.dumps(gui_state, indent=2)}",
+                f"Current GUI state:\n{orjson.dumps(gui_state, default=str).decode()}"
+            )
+            state_hash = self._gui_state_hash(prompt, len(task_state.action_history))
+            if state_hash == self._last_incomplete_hash:
+                logger.debug("GUI state unchanged since last incomplete check, skipping verification")
+                return False
+            
+            verification = await self.claude.plan_actions(
+                prompt,
                 gui_state,
                 action_history=task_state.action_history
             )
             
             # Empty response means task is complete
-            return not verification
+            if verification:
+                self._last_incomplete_hash = state_hash
+                return False
+            self._last_incomplete_hash = None
+            return True
             
         except Exception as e:
             logger.error(f"Task completion check failed: {str(e)}")
             return False
 
+    def _gui_state_hash(self, prompt: str, history_len: int) -> bytes:
+        """Stable digest of the verification prompt and action history length"""
+        digest = hashlib.blake2b(prompt.encode(), digest_size=8)
+        digest.update(history_len.to_bytes(8, "little"))
+        return digest.digest()
+
     async def _verify_completion(self, task: str, task_state: TaskState) -> bool:
         """Get final verification from user and update cache if successful"""
-        user_verification = input("Did I complete the task as expected? (yes/no): ")
+        # Look up the cached sequence while waiting on the user
+        cached_lookup = None
+        if task_state.action_history:
+            cached_lookup = asyncio.create_task(self.cache.get_similar_task(task))
+        
+        user_verification = await self._prompt_user("Did I complete the task as expected? (yes/no): ")
         
         if user_verification.lower() == 'yes':
             # Store successful sequence if we created one
-            if task_state.action_history and not await self.cache.get_similar_task(task):
+            if cached_lookup and not await cached_lookup:
                 actions = [h["action"] for h in task_state.action_history if h["success"]]
                 await self.cache.store_sequence(task, actions)
-                await self.cache.update_stats(task, 0.0, True)
+                await self.cache.update_stats(task, time.monotonic() - task_state.started_at, True)
             task_state.goal_achieved = True
             print("What would you like me to do next?")
             return True
         else:
+            if cached_lookup:
+                cached_lookup.cancel()
             print("Can you clarify your request again for me?")
             return False
+
+    async def _prompt_user(self, prompt: str) -> str:
+        """Read user input without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, input, prompt)
             
     async def _execute_sequence(self, sequence: Union[ActionSequence, List[Action]], task_state: TaskState) -> bool:
         """Execute a sequence of actions"""
@@ -1004,8 +1107,10 @@ class TaskExecutor:
                         logger.error(f"Verification failed: {str(e)}")
                     return False
                 
-                # Allow time for page updates
-                await asyncio.sleep(1)
+                # Allow time for page updates - navigation already waited in
+                # the preparatory actions
+                if action.type != 'navigate':
+                    await self._wait_for_stable(timeout_ms=1000)
             
             return True
             
@@ -1013,20 +1118,28 @@ class TaskExecutor:
             logger.error(f"Action execution failed: {e}")
             return False
             
+    async def _wait_for_stable(self, timeout_ms: int = 1000):
+        """Wait for the network to go idle, falling back to a short pause"""
+        try:
+            await self.browser.page.wait_for_load_state("networkidle", timeout=timeout_ms)
+        except Exception:
+            await asyncio.sleep(0.2)
+
     async def _execute_preparatory_actions(self):
         """Execute actions to stabilize page state after navigation"""
         try:
-            # Wait for initial load
-            await asyncio.sleep(2)
+            # Wait for initial load, then read the viewport once
+            await self._wait_for_dom_ready(timeout_ms=2000)
+            viewport = self.browser.page.viewport_size
             
             # Scroll actions to trigger lazy loading
             await self._perform_scroll_actions()
             
             # Move cursor to trigger hover states
-            await self._perform_cursor_movements()
+            await self._perform_cursor_movements(viewport)
             
             # Click in blank areas to trigger popups
-            await self._perform_blank_clicks()
+            await self._perform_blank_clicks(viewport)
             
             # Handle any popups that appeared
             await self._handle_conditional_popups()
@@ -1034,40 +1147,34 @@ class TaskExecutor:
         except Exception as e:
             logger.warning(f"Preparatory actions failed: {str(e)}")
 
+    async def _wait_for_dom_ready(self, timeout_ms: int):
+        """Wait until the DOM is loaded, giving up after timeout"""
+        try:
+            await self.browser.page.wait_for_load_state("domcontentloaded", timeout=timeout_ms)
+        except Exception:
+            logger.debug("DOM not ready before timeout, continuing")
+
     async def _perform_scroll_actions(self):
         """Perform scroll actions to trigger lazy loading"""
         try:
-            # Get page dimensions
-            dimensions = await self.browser.page.evaluate("""() => {
-                return {
-                    height: document.documentElement.scrollHeight,
-                    width: document.documentElement.scrollWidth
+            # Scroll to 25%, 50%, 75% of page then back to top in one round-trip
+            await self.browser.page.evaluate("""async () => {
+                const height = document.documentElement.scrollHeight;
+                for (const fraction of [0.25, 0.5, 0.75, 0]) {
+                    window.scrollTo(0, height * fraction);
+                    await new Promise(resolve => setTimeout(resolve, 500));
                 }
             }""")
             
-            # Scroll points (25%, 50%, 75% of page)
-            scroll_points = [
-                dimensions['height'] * 0.25,
-                dimensions['height'] * 0.50,
-                dimensions['height'] * 0.75
-            ]
-            
-            for scroll_y in scroll_points:
-                await self.browser.page.evaluate(f"window.scrollTo(0, {scroll_y})")
-                await asyncio.sleep(0.5)
-            
-            # Scroll back to top
-            await self.browser.page.evaluate("window.scrollTo(0, 0)")
-            await asyncio.sleep(0.5)
-            
         except Exception as e:
             logger.warning(f"Scroll actions failed: {str(e)}")
 
-    async def _perform_cursor_movements(self):
+    async def _perform_cursor_movements(self, viewport: Optional[Dict] = None):
         """Move cursor to trigger hover states and popups"""
         try:
             # Get viewport dimensions
-            viewport = await self.browser.page.viewport_size
+            if viewport is None:
+                viewport = self.browser.page.viewport_size
             if not viewport:
                 return
                 
@@ -1087,11 +1194,12 @@ class TaskExecutor:
         except Exception as e:
             logger.warning(f"Cursor movements failed: {str(e)}")
 
-    async def _perform_blank_clicks(self):
+    async def _perform_blank_clicks(self, viewport: Optional[Dict] = None):
         """Click in blank areas to trigger popups"""
         try:
             # Get viewport dimensions
-            viewport = await self.browser.page.viewport_size
+            if viewport is None:
+                viewport = self.browser.page.viewport_size
             if not viewport:
                 return
                 
@@ -1103,14 +1211,15 @@ class TaskExecutor:
                 (viewport['width'] - 50, viewport['height'] // 2)  # Right center
             ]
             
-            for x, y in blank_areas:
+            # Look up the element under every point in a single round-trip
+            tags = await self.browser.page.evaluate("""(points) => points.map(([x, y]) => {
+                const element = document.elementFromPoint(x, y);
+                return element ? element.tagName : null;
+            })""", blank_areas)
+            
+            for (x, y), element in zip(blank_areas, tags):
                 try:
-                    # Check if point is clickable (not over an element)
-                    element = await self.browser.page.evaluate(f"""() => {{
-                        let element = document.elementFromPoint({x}, {y});
-                        return element ? element.tagName : null;
-                    }}""")
-                    
+                    # Only click points that are not over an element
                     if not element or element.lower() in ['body', 'html']:
                         await self.browser.page.mouse.click(x, y)
                         await asyncio.sleep(0.5)
@@ -1171,53 +1280,38 @@ class TaskExecutor:
     async def _find_partial_matches(self, task: str) -> List[ActionSequence]:
         """Find cached sequences that might be part of completing this task"""
         partial_matches = []
+        task_lower = task.lower()
         
-        # Common task components
-        navigation_tasks = [
-            "go to",
-            "navigate to",
-            "open",
-            "visit"
-        ]
-        
-        # Extract target from task
-        task_parts = task.lower().split()
+        # Single scan for navigation phrases, keeping the first occurrence of each
+        nav_positions = {}
+        for match in _NAVIGATION_RE.finditer(task_lower):
+            nav_positions.setdefault(match.group(), match.end())
         
         # Look for navigation sequences first
-        for nav in navigation_tasks:
-            if nav in task.lower():
-                nav_target = task[task.lower().index(nav) + len(nav):].strip()
+        for nav in _NAVIGATION_PHRASES:
+            if nav in nav_positions:
+                nav_target = task[nav_positions[nav]:].strip()
                 nav_sequence = await self.cache.get_similar_task(f"{nav} {nav_target}")
                 if nav_sequence and nav_sequence.success_rate > 0.8:
                     partial_matches.append(nav_sequence)
         
-        # Look for known sub-tasks
-        known_tasks = {
-            "gbp/usd": ["currency", "pair", "gbp", "usd"],
-            "historical data": ["historical", "history", "past"],
-            "news": ["news", "article", "story"],
-            "technical analysis": ["technical", "analysis", "chart"]
+        # Look for known sub-tasks by keyword
+        matched_subtasks = {
+            _SUBTASK_KEYWORDS[word] for word in task_lower.split()
+            if word in _SUBTASK_KEYWORDS
         }
         
-        for key, keywords in known_tasks.items():
-            if any(word in task_parts for word in keywords):
+        for key in _KNOWN_SUBTASKS:
+            if key in matched_subtasks:
                 cached = await self.cache.get_similar_task(f"find {key}")
                 if cached and cached.success_rate > 0.8:
                     partial_matches.append(cached)
         
         return partial_matches 
 
-    def _serialize_for_json(self, data):
-        """Recursively convert data to JSON-serializable format"""
-        if isinstance(data, dict):
-            return {key: self._serialize_for_json(value) for key, value in data.items()}
-        elif isinstance(data, list):
-            return [self._serialize_for_json(item) for item in data]
-        elif isinstance(data, datetime):
-            return data.isoformat()
-        elif hasattr(data, '__dict__'):  # Handle objects
-            return self._serialize_for_json(data.__dict__)
-        return data
+    def _serialize_for_json(self, data) -> str:
+        """Serialize data to a JSON string, handling datetimes and objects"""
+        return orjson.dumps(data, default=_json_default, option=orjson.OPT_NON_STR_KEYS).decode()
 
     def _serialize_timestamp(self, timestamp) -> str:
         """Convert timestamp to string format safely"""
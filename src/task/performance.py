@@ -1,59 +1,102 @@
-from typing import Dict, Any, Callable
+from typing import Dict, Any, Awaitable, Callable, Deque, Optional
 import time
 import asyncio
+from collections import OrderedDict, deque
 from functools import lru_cache, wraps
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 
+import orjson
+
+STATE_CACHE_TTL = 60  # Cache for 60 seconds
+STATE_CACHE_MAXSIZE = 256
+RECENT_DURATIONS_WINDOW = 1024
+
 @dataclass
 class PerformanceMetrics:
     """Track performance metrics"""
     action_count: int = 0
     start_time: datetime = field(default_factory=datetime.now)
-    action_durations: List[float] = field(default_factory=list)
+    avg_duration: float = 0.0  # Running mean over all actions
+    max_duration: float = 0.0
+    action_durations: Deque[float] = field(
+        default_factory=lambda: deque(maxlen=RECENT_DURATIONS_WINDOW)
+    )  # Most recent durations only
     errors: Dict[str, int] = field(default_factory=dict)
 
 class RateLimiter:
     """Rate limit action execution"""
-    def __init__(self, max_actions: int, time_window: int):
+    def __init__(self,
+                 max_actions: int,
+                 time_window: int,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], Awaitable[None]] = asyncio.sleep):
         self.max_actions = max_actions
         self.time_window = time_window
-        self.action_times = []
+        self._clock = clock
+        self._sleep = sleep
+        self.action_times: Deque[float] = deque()
+        self._lock: Optional[asyncio.Lock] = None  # Created on first acquire, inside the running loop
+        
+    def _evict_expired(self, now: float):
+        """Drop actions that fell out of the time window"""
+        while self.action_times and now - self.action_times[0] >= self.time_window:
+            self.action_times.popleft()
         
     async def acquire(self):
         """Acquire rate limit slot"""
-        now = time.time()
-        
-        # Remove old actions
-        self.action_times = [t for t in self.action_times 
-                           if now - t < self.time_window]
-                           
-        # Check if we can proceed
-        if len(self.action_times) >= self.max_actions:
-            sleep_time = self.action_times[0] + self.time_window - now
-            if sleep_time > 0:
-                await asyncio.sleep(sleep_time)
+        if self._lock is None:
+            self._lock = asyncio.Lock()  # Waiters are served in FIFO order
+        async with self._lock:
+            now = self._clock()
+            self._evict_expired(now)
+            
+            # Check if we can proceed
+            if len(self.action_times) >= self.max_actions:
+                sleep_time = self.action_times[0] + self.time_window - now
+                if sleep_time > 0:
+                    await self._sleep(sleep_time)
+                now = self._clock()
+                self._evict_expired(now)
                 
-        self.action_times.append(now)
+            self.action_times.append(now)
+
+def _cache_key(args: tuple, kwargs: dict):
+    """Build a cache key, hashing arguments directly when possible"""
+    key = (args, tuple(sorted(kwargs.items()))) if kwargs else args
+    try:
+        hash(key)
+        return key
+    except TypeError:
+        # Unhashable arguments (e.g. GUI state dicts) - use canonical JSON
+        return orjson.dumps(
+            [args, kwargs],
+            default=repr,
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+        )
 
 def cache_state(func):
-    """Cache state results with TTL"""
-    cache = {}
-    TTL = 60  # Cache for 60 seconds
+    """Cache state results with TTL and LRU eviction"""
+    cache = OrderedDict()
     
     @wraps(func)
     async def wrapper(*args, **kwargs):
-        key = str(args) + str(kwargs)
-        now = time.time()
+        key = _cache_key(args, kwargs)
+        now = time.monotonic()
         
-        if key in cache:
-            result, timestamp = cache[key]
-            if now - timestamp < TTL:
+        entry = cache.get(key)
+        if entry is not None:
+            result, timestamp = entry
+            if now - timestamp < STATE_CACHE_TTL:
+                cache.move_to_end(key)
                 return result
+            del cache[key]
                 
         result = await func(*args, **kwargs)
         cache[key] = (result, now)
+        if len(cache) > STATE_CACHE_MAXSIZE:
+            cache.popitem(last=False)
         return result
         
     return wrapper
@@ -65,8 +108,12 @@ class PerformanceMonitor:
         
     def track_action(self, duration: float):
         """Track action execution"""
-        self.metrics.action_count += 1
-        self.metrics.action_durations.append(duration)
+        metrics = self.metrics
+        metrics.action_count += 1
+        metrics.avg_duration += (duration - metrics.avg_duration) / metrics.action_count
+        if duration > metrics.max_duration:
+            metrics.max_duration = duration
+        metrics.action_durations.append(duration)
         
     def track_error(self, error_type: str):
         """Track error occurrence"""
@@ -74,13 +121,13 @@ class PerformanceMonitor:
         
     def get_stats(self) -> Dict[str, Any]:
         """Get performance statistics"""
-        if not self.metrics.action_durations:
+        if not self.metrics.action_count:
             return {}
             
         return {
             "total_actions": self.metrics.action_count,
-            "avg_duration": sum(self.metrics.action_durations) / len(self.metrics.action_durations),
-            "max_duration": max(self.metrics.action_durations),
+            "avg_duration": self.metrics.avg_duration,
+            "max_duration": self.metrics.max_duration,
             "error_count": sum(self.metrics.errors.values()),
             "error_types": dict(self.metrics.errors),
             "uptime": (datetime.now() - self.metrics.start_time).total_seconds()
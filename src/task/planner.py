@@ -1,4 +1,5 @@
 from typing import List, Optional, Dict
+import orjson
 from src.actions.action_cache import Action, ActionSequence
 from src.llm.claude_client import ClaudeClient
 import logging
@@ -33,7 +34,7 @@ class TaskPlanner:
         try:
             verification = await self.claude.plan_actions(
                 f"Verify if this task is complete: {task}\n"
-                f"Current GUI state:\n{gui_state}",
+                f"Current GUI state:\n{orjson.dumps(gui_state, default=str).decode()}",
                 gui_state,
                 action_history=None
             )
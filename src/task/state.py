@@ -1,56 +1,177 @@
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, NamedTuple, Sequence, Tuple
+from collections import OrderedDict, deque
 from dataclasses import dataclass, field
 from datetime import datetime
-import json
 import logging
-from functools import lru_cache
+import sys
+import time
 
-@dataclass
+import orjson
+
+STATE_CACHE_TTL = 2.0  # Seconds a captured state is reused for the same page
+STATE_CACHE_SIZE = 100
+STATE_HISTORY_SIZE = 100  # Snapshots kept in state_history, oldest evicted first
+DIFF_TEXT_PREFIX = 32  # Characters of element text used to match elements across states
+DIFF_MAX_EDITS = 1000  # Beyond this many edits the diff stops looking for matches
+
+def _myers_diff(a: Sequence, b: Sequence) -> Tuple[List[int], List[int]]:
+    """Return (indices deleted from a, indices inserted into b) using Myers' O(ND) diff"""
+    # Trim the common prefix and suffix, most of a page rarely changes
+    start = 0
+    end_a, end_b = len(a), len(b)
+    while start < end_a and start < end_b and a[start] == b[start]:
+        start += 1
+    while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+        
+    n, m = end_a - start, end_b - start
+    v = {1: 0}
+    trace = []
+    for d in range(min(n + m, DIFF_MAX_EDITS) + 1):
+        trace.append(dict(v))
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[k - 1] < v[k + 1]):
+                x = v[k + 1]
+            else:
+                x = v[k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[start + x] == b[start + y]:
+                x += 1
+                y += 1
+            v[k] = x
+            if x >= n and y >= m:
+                return _myers_backtrack(trace, n, m, start)
+                
+    # Too many changes to be worth matching, treat the middle as replaced
+    return list(range(start, end_a)), list(range(start, end_b))
+
+def _myers_backtrack(trace: List[Dict[int, int]], n: int, m: int, offset: int) -> Tuple[List[int], List[int]]:
+    """Walk the Myers trace back from (n, m) and collect the edits"""
+    deleted, inserted = [], []
+    x, y = n, m
+    for d in range(len(trace) - 1, 0, -1):
+        v = trace[d]
+        k = x - y
+        if k == -d or (k != d and v[k - 1] < v[k + 1]):
+            prev_k = k + 1
+            inserted.append(offset + v[prev_k] - prev_k)
+        else:
+            prev_k = k - 1
+            deleted.append(offset + v[prev_k])
+        x = v[prev_k]
+        y = x - prev_k
+    deleted.reverse()
+    inserted.reverse()
+    return deleted, inserted
+
+# Slotted dataclasses need Python 3.10+
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+class Element(NamedTuple):
+    """A visible page element"""
+    tag: str
+    id: str
+    text: str
+    selector: str
+
+@dataclass(eq=False, **_SLOTS)
 class GUIState:
     """Represents a snapshot of GUI state"""
     url: str
     title: str
     viewport: Dict
-    elements: List[Dict]
+    # Element data is kept column-wise, one entry per element
+    tags: List[str] = field(default_factory=list)
+    ids: List[str] = field(default_factory=list)
+    texts: List[str] = field(default_factory=list)
+    selectors: List[str] = field(default_factory=list)
     timestamp: datetime = field(default_factory=datetime.now)
+    _diff_keys: Optional[List[Tuple]] = field(default=None, init=False, repr=False, compare=False)
+    
+    def element(self, i: int) -> Element:
+        """Materialize element i"""
+        return Element(self.tags[i], self.ids[i], self.texts[i], self.selectors[i])
+        
+    @property
+    def elements(self) -> List[Element]:
+        """All elements"""
+        return list(map(Element, self.tags, self.ids, self.texts, self.selectors))
+        
+    def diff_keys(self) -> List[Tuple]:
+        """Keys identifying elements across states, in document order, built on first use"""
+        if self._diff_keys is None:
+            self._diff_keys = [
+                (tag, el_id, (text or "")[:DIFF_TEXT_PREFIX])
+                for tag, el_id, text in zip(self.tags, self.ids, self.texts)
+            ]
+        return self._diff_keys
+        
+    def to_bytes(self) -> bytes:
+        """Serialize to JSON, keeping elements column-wise"""
+        return orjson.dumps({
+            "url": self.url,
+            "title": self.title,
+            "viewport": self.viewport,
+            "elements": {
+                "tags": self.tags,
+                "ids": self.ids,
+                "texts": self.texts,
+                "selectors": self.selectors
+            },
+            "ts": self.timestamp.timestamp()
+        })
 
 class StateManager:
-    def __init__(self):
-        self.state_history = []
+    def __init__(self, history_size: int = STATE_HISTORY_SIZE):
+        self.state_history = deque(maxlen=history_size)
+        self._state_cache = OrderedDict()  # (url, page id, offscreen) -> (state, captured at)
+        self._use_cdp = True
+        self._cdp_sessions = {}  # id(page) -> CDP session reused across captures
+        self._now = time.monotonic  # Clock for cache expiry, replaceable in tests
         
-    @lru_cache(maxsize=100)
-    async def capture_state(self, page) -> Optional[GUIState]:
-        """Capture current GUI state with caching"""
-        try:
-            if not page:
-                return None
-                
-            # Get basic page info
-            url = page.url
-            title = await page.title()
-            viewport = await page.viewport_size
+    async def capture_state(self, page, include_offscreen: bool = False) -> Optional[GUIState]:
+        """Capture current GUI state with caching
+        
+        Only elements intersecting the viewport are captured unless
+        include_offscreen is set.
+        """
+        if not page:
+            return None
             
-            # Get visible elements
-            elements = await page.evaluate("""() => {
-                return Array.from(document.querySelectorAll('*'))
-                    .filter(el => {
-                        const rect = el.getBoundingClientRect();
-                        return rect.width > 0 && rect.height > 0;
-                    })
-                    .map(el => ({
-                        tag: el.tagName,
-                        id: el.id,
-                        text: el.innerText,
-                        isVisible: true,
-                        selector: el.id ? '#' + el.id : el.className
-                    }));
-            }""")
+        page_key = (page.url, id(page), include_offscreen)
+        now = self._now()
+        
+        cached = self._state_cache.get(page_key)
+        if cached and now - cached[1] < STATE_CACHE_TTL:
+            self._state_cache.move_to_end(page_key)
+            return cached[0]
+            
+        state = await self._capture_state(page, include_offscreen)
+        if state is not None:
+            self._state_cache[page_key] = (state, now)
+            self._state_cache.move_to_end(page_key)
+            if len(self._state_cache) > STATE_CACHE_SIZE:
+                self._state_cache.popitem(last=False)
+        return state
+        
+    async def _capture_state(self, page, include_offscreen: bool = False) -> Optional[GUIState]:
+        """Capture GUI state from the page"""
+        try:
+            # Prefer the native CDP snapshot, fall back to a DOM walk.
+            # Both return title and viewport alongside the element columns.
+            columns = await self._capture_snapshot(page, include_offscreen)
+            if columns is None:
+                columns = await self._evaluate_columns(page, include_offscreen)
             
             state = GUIState(
-                url=url,
-                title=title,
-                viewport=viewport,
-                elements=elements
+                url=page.url,
+                title=columns["title"],
+                viewport=columns["viewport"],
+                tags=columns["tags"],
+                ids=columns["ids"],
+                texts=columns["texts"],
+                selectors=columns["selectors"]
             )
             
             self.state_history.append(state)
@@ -60,6 +181,191 @@ class StateManager:
             logging.error(f"State capture failed: {str(e)}")
             return None
             
+    async def _capture_snapshot(self, page, include_offscreen: bool = False) -> Optional[Dict]:
+        """Capture visible element columns with CDP DOMSnapshot (Chromium only)"""
+        if not self._use_cdp:
+            return None
+            
+        try:
+            cdp = await self._cdp_session(page)
+        except Exception:
+            # Non-Chromium driver, don't try again
+            self._use_cdp = False
+            return None
+            
+        try:
+            snapshot = await cdp.send("DOMSnapshot.captureSnapshot", {
+                "computedStyles": ["visibility", "opacity"],
+                "includePaintOrder": False,
+                "includeDOMRects": True
+            })
+            # viewport_size is held by the driver, no round-trip
+            return self._snapshot_columns(snapshot, page.viewport_size, include_offscreen)
+        except Exception as e:
+            logging.warning(f"DOM snapshot failed, falling back to evaluate: {str(e)}")
+            await self._drop_cdp_session(page)
+            return None
+            
+    async def _cdp_session(self, page):
+        """Get the page's CDP session, opening it on first use"""
+        key = id(page)
+        cdp = self._cdp_sessions.get(key)
+        if cdp is None:
+            cdp = await page.context.new_cdp_session(page)
+            self._cdp_sessions[key] = cdp
+            page.once("close", lambda _: self._cdp_sessions.pop(key, None))
+        return cdp
+        
+    async def _drop_cdp_session(self, page):
+        """Forget the page's CDP session so the next capture opens a fresh one"""
+        cdp = self._cdp_sessions.pop(id(page), None)
+        if cdp is not None:
+            try:
+                await cdp.detach()
+            except Exception:
+                pass
+                
+    def _snapshot_columns(self, snapshot: Dict, viewport: Optional[Dict], include_offscreen: bool) -> Dict:
+        """Extract visible element columns from a DOMSnapshot.captureSnapshot result"""
+        strings = snapshot["strings"]
+        document = snapshot["documents"][0]
+        nodes = document["nodes"]
+        layout = document["layout"]
+        node_names = nodes["nodeName"]
+        node_types = nodes["nodeType"]
+        parents = nodes["parentIndex"]
+        attributes = nodes.get("attributes") or []
+        count = len(node_types)
+        
+        # Bounds are in document coordinates, cull against the scrolled viewport
+        cull = not include_offscreen and bool(viewport)
+        if cull:
+            left = document.get("scrollOffsetX", 0)
+            top = document.get("scrollOffsetY", 0)
+            right = left + viewport["width"]
+            bottom = top + viewport["height"]
+        
+        # Hidden like checkVisibility(): visibility is already inherited in the
+        # computed style, opacity:0 hides the whole subtree so propagate it
+        hidden = [False] * count
+        if not include_offscreen:
+            transparent = [False] * count
+            for node, style in zip(layout["nodeIndex"], layout["styles"]):
+                if not style:
+                    continue
+                if strings[style[0]] in ("hidden", "collapse"):
+                    hidden[node] = True
+                if strings[style[1]] == "0":
+                    transparent[node] = True
+            for node in range(count):  # Document order, parents come first
+                parent = parents[node]
+                if parent >= 0 and transparent[parent]:
+                    transparent[node] = True
+                if transparent[node]:
+                    hidden[node] = True
+        
+        # Text nodes carry rendered text; concatenate them in document order
+        # so an element's innerText is the slice covering its subtree
+        text_of = {}
+        visible = []
+        for node, bounds, text in zip(layout["nodeIndex"], layout["bounds"], layout["text"]):
+            if hidden[node]:
+                continue
+            if node_types[node] == 3:
+                if text >= 0:
+                    text_of[node] = strings[text]
+            elif node_types[node] == 1 and bounds[2] > 0 and bounds[3] > 0:
+                x, y, width, height = bounds
+                if cull and (x + width <= left or x >= right or y + height <= top or y >= bottom):
+                    continue
+                visible.append(node)
+                
+        offsets = [0] * (count + 1)
+        chunks = []
+        position = 0
+        for node in range(count):
+            offsets[node] = position
+            text = text_of.get(node)
+            if text:
+                chunks.append(text)
+                position += len(text)
+        offsets[count] = position
+        all_text = "".join(chunks)
+        
+        # Preorder numbering makes each subtree a contiguous index range
+        subtree_end = list(range(1, count + 1))
+        for node in range(count - 1, 0, -1):
+            parent = parents[node]
+            if parent >= 0 and subtree_end[node] > subtree_end[parent]:
+                subtree_end[parent] = subtree_end[node]
+                
+        tags, ids, texts, selectors = [], [], [], []
+        tag_names = {}  # strings index -> interned tag
+        for node in visible:
+            attrs = attributes[node] if node < len(attributes) else []
+            el_id = el_class = ""
+            for j in range(0, len(attrs) - 1, 2):
+                name = strings[attrs[j]]
+                if name == "id":
+                    el_id = strings[attrs[j + 1]]
+                elif name == "class":
+                    el_class = strings[attrs[j + 1]]
+            name = node_names[node]
+            tag = tag_names.get(name)
+            if tag is None:
+                tag = tag_names[name] = sys.intern(strings[name])
+            tags.append(tag)
+            ids.append(el_id)
+            texts.append(all_text[offsets[node]:offsets[subtree_end[node]]])
+            selectors.append("#" + el_id if el_id else el_class)
+            
+        title = document.get("title", -1)
+        return {
+            "title": strings[title] if title >= 0 else "",
+            "viewport": viewport,
+            "tags": tags,
+            "ids": ids,
+            "texts": texts,
+            "selectors": selectors
+        }
+        
+    async def _evaluate_columns(self, page, include_offscreen: bool = False) -> Dict:
+        """Capture visible element columns by walking the DOM in page script"""
+        columns = await page.evaluate("""(includeOffscreen) => {
+            const TAGS = {};
+            const tagNames = [];
+            const all = document.getElementsByTagName('*');
+            const tags = [], ids = [], texts = [], selectors = [];
+            const width = window.innerWidth, height = window.innerHeight;
+            for (let i = 0; i < all.length; i++) {
+                const el = all[i];
+                const rect = el.getBoundingClientRect();
+                if (rect.width <= 0 || rect.height <= 0) continue;
+                if (!includeOffscreen) {
+                    if (rect.bottom <= 0 || rect.top >= height || rect.right <= 0 || rect.left >= width) continue;
+                    if (el.checkVisibility && !el.checkVisibility({checkOpacity: true, checkVisibilityCSS: true})) continue;
+                }
+                let tag = TAGS[el.tagName];
+                if (tag === undefined) {
+                    tag = TAGS[el.tagName] = tagNames.length;
+                    tagNames.push(el.tagName);
+                }
+                tags.push(tag);
+                ids.push(el.id);
+                texts.push(el.innerText);
+                selectors.push(el.id ? '#' + el.id : el.className);
+            }
+            return {
+                title: document.title,
+                viewport: {width, height},
+                tagNames, tags, ids, texts, selectors, n: tags.length
+            };
+        }""", include_offscreen)
+        
+        tag_names = [sys.intern(tag) for tag in columns["tagNames"]]
+        columns["tags"] = [tag_names[t] for t in columns["tags"]]
+        return columns
+            
     def get_state_diff(self, before: GUIState, after: GUIState) -> Dict:
         """Compare two states and return differences"""
         try:
@@ -68,21 +374,37 @@ class StateManager:
                 "title_changed": before.title != after.title,
                 "viewport_changed": before.viewport != after.viewport,
                 "elements_added": [],
-                "elements_removed": []
+                "elements_removed": [],
+                "elements_moved": []
             }
             
-            # Compare elements
-            before_elements = {el["selector"]: el for el in before.elements}
-            after_elements = {el["selector"]: el for el in after.elements}
-            
-            diffs["elements_added"] = [
-                el for sel, el in after_elements.items() 
-                if sel not in before_elements
-            ]
+            # Align elements in document order, matching on (tag, id, text prefix)
+            # Hash each key once and diff small ints instead of tuples
+            codes = {}
+            before_keys = [codes.setdefault(key, len(codes)) for key in before.diff_keys()]
+            after_keys = [codes.setdefault(key, len(codes)) for key in after.diff_keys()]
+            deleted, inserted = _myers_diff(before_keys, after_keys)
             
+            # A delete and an insert with the same key is a move
+            pending = {}
+            for i in deleted:
+                pending.setdefault(before_keys[i], deque()).append(i)
+            moved_from = set()
+            for j in inserted:
+                candidates = pending.get(after_keys[j])
+                if candidates:
+                    i = candidates.popleft()
+                    moved_from.add(i)
+                    diffs["elements_moved"].append({
+                        "element": after.element(j),
+                        "from_index": i,
+                        "to_index": j
+                    })
+                else:
+                    diffs["elements_added"].append(after.element(j))
+                    
             diffs["elements_removed"] = [
-                el for sel, el in before_elements.items()
-                if sel not in after_elements
+                before.element(i) for i in deleted if i not in moved_from
             ]
             
             return diffs
@@ -1,5 +1,8 @@
 import logging
 import asyncio
+import heapq
+import itertools
+import time
 import uuid
 from typing import Dict, List, Optional, Callable, Awaitable
 from datetime import datetime
@@ -18,15 +21,27 @@ class TaskStatus(Enum):
     CANCELLED = "cancelled"
     PAUSED = "paused"
 
-@dataclass
+def _format_ns(timestamp_ns: Optional[int]) -> Optional[str]:
+    """Format an epoch nanosecond timestamp as ISO 8601"""
+    if timestamp_ns is None:
+        return None
+    return datetime.fromtimestamp(timestamp_ns / 1e9).isoformat()
+
+@dataclass(eq=False)
 class Task:
     """Represents a task"""
+    __slots__ = (
+        "id", "description", "status", "created_at", "started_at", "completed_at",
+        "error", "metadata", "subtasks", "parent_id", "priority", "max_retries",
+        "retry_count", "timeout"
+    )
+    
     id: str
     description: str
     status: TaskStatus
-    created_at: str
-    started_at: Optional[str]
-    completed_at: Optional[str]
+    created_at: int  # Epoch nanoseconds
+    started_at: Optional[int]
+    completed_at: Optional[int]
     error: Optional[str]
     metadata: Dict
     subtasks: List['Task']
@@ -36,22 +51,73 @@ class Task:
     retry_count: int
     timeout: Optional[float]
 
+class _TaskHeap:
+    """Priority queue backed by a plain heap and a wake-up event
+    
+    Cheaper than asyncio.PriorityQueue: no lock, no condition and no
+    unfinished-task bookkeeping.
+    """
+    
+    def __init__(self):
+        self._heap = []
+        self._wake = asyncio.Event()
+        
+    def put_nowait(self, item):
+        heapq.heappush(self._heap, item)
+        self._wake.set()
+        
+    async def put(self, item):
+        self.put_nowait(item)
+        
+    async def get(self):
+        while not self._heap:
+            self._wake.clear()
+            await self._wake.wait()
+        return heapq.heappop(self._heap)
+        
+    def empty(self) -> bool:
+        return not self._heap
+        
+    def extend(self, items):
+        """Push several items with one heapify and one wake-up"""
+        if not items:
+            return
+        self._heap.extend(items)
+        heapq.heapify(self._heap)
+        self._wake.set()
+        
+    def qsize(self) -> int:
+        return len(self._heap)
+
 class TaskManager:
     """Manages tasks and workflows"""
     
     def __init__(self):
         self.tasks = {}
         self.running_tasks = set()
-        self.task_queue = asyncio.PriorityQueue()
+        self.task_queue = _TaskHeap()  # (priority, seq, task_id)
+        self._seq = itertools.count()  # FIFO tie-breaker within a priority
+        self._by_status = {status: {} for status in TaskStatus}  # Insertion-ordered id indexes
         self.task_handlers = {}
         self.max_concurrent_tasks = config.task.max_concurrent_tasks
         self.task_timeout = config.task.default_timeout
+        self._workers = []
         
     def register_handler(self, task_type: str, handler: Callable[[Task], Awaitable[None]]):
         """Register a task handler"""
         self.task_handlers[task_type] = handler
         logger.debug(f"Registered handler for task type: {task_type}")
         
+    def _set_status(self, task: Task, status: TaskStatus):
+        """Update task status and keep the status index in sync"""
+        self._by_status[task.status].pop(task.id, None)
+        self._by_status[status][task.id] = None
+        task.status = status
+        
+    async def _enqueue(self, task: Task):
+        """Queue a task by priority, FIFO among equal priorities"""
+        self.task_queue.put_nowait((task.priority, next(self._seq), task.id))
+        
     async def create_task(self,
                          description: str,
                          task_type: str,
@@ -67,7 +133,7 @@ class TaskManager:
                 id=task_id,
                 description=description,
                 status=TaskStatus.PENDING,
-                created_at=datetime.now().isoformat(),
+                created_at=time.time_ns(),
                 started_at=None,
                 completed_at=None,
                 error=None,
@@ -85,10 +151,11 @@ class TaskManager:
             
             # Store task
             self.tasks[task_id] = task
+            self._by_status[task.status][task_id] = None
             
             # Add to queue if no parent
             if not parent_id:
-                await self.task_queue.put((priority, task_id))
+                await self._enqueue(task)
                 
             logger.debug(f"Created task: {task_id}")
             return task_id
@@ -99,6 +166,15 @@ class TaskManager:
             
     async def start_task(self, task_id: str):
         """Start a task"""
+        # Check if we can run more tasks
+        if len(self.running_tasks) >= self.max_concurrent_tasks:
+            logger.warning("Maximum concurrent tasks reached")
+            return
+            
+        await self._run_task(task_id)
+        
+    async def _run_task(self, task_id: str):
+        """Run a pending task; queue workers are already bounded by their count"""
         try:
             task = self.tasks.get(task_id)
             if not task:
@@ -109,14 +185,9 @@ class TaskManager:
                 logger.warning(f"Task {task_id} is not pending")
                 return
                 
-            # Check if we can run more tasks
-            if len(self.running_tasks) >= self.max_concurrent_tasks:
-                logger.warning("Maximum concurrent tasks reached")
-                return
-                
             # Update task status
-            task.status = TaskStatus.RUNNING
-            task.started_at = datetime.now().isoformat()
+            self._set_status(task, TaskStatus.RUNNING)
+            task.started_at = time.time_ns()
             self.running_tasks.add(task_id)
             
             # Get task handler
@@ -134,12 +205,14 @@ class TaskManager:
                     await handler(task)
                     
                 # Mark as completed
-                task.status = TaskStatus.COMPLETED
-                task.completed_at = datetime.now().isoformat()
+                self._set_status(task, TaskStatus.COMPLETED)
+                task.completed_at = time.time_ns()
                 
                 # Start subtasks
-                for subtask in task.subtasks:
-                    await self.task_queue.put((subtask.priority, subtask.id))
+                self.task_queue.extend([
+                    (subtask.priority, next(self._seq), subtask.id)
+                    for subtask in task.subtasks
+                ])
                     
             except asyncio.TimeoutError:
                 task.error = "Task timed out"
@@ -160,29 +233,31 @@ class TaskManager:
         if task.retry_count < task.max_retries:
             # Retry task
             task.retry_count += 1
-            task.status = TaskStatus.PENDING
+            self._set_status(task, TaskStatus.PENDING)
             task.error = None
-            await self.task_queue.put((task.priority, task.id))
+            await self._enqueue(task)
             logger.debug(f"Retrying task {task.id} (attempt {task.retry_count})")
         else:
             # Mark as failed
-            task.status = TaskStatus.FAILED
+            self._set_status(task, TaskStatus.FAILED)
             logger.error(f"Task {task.id} failed after {task.retry_count} retries")
             
     async def cancel_task(self, task_id: str):
-        """Cancel a task"""
+        """Cancel a task and all of its subtasks"""
         try:
             task = self.tasks.get(task_id)
             if not task:
                 return
                 
-            task.status = TaskStatus.CANCELLED
-            
-            # Cancel subtasks
-            for subtask in task.subtasks:
-                await self.cancel_task(subtask.id)
+            cancelled = 0
+            stack = [task]
+            while stack:
+                current = stack.pop()
+                self._set_status(current, TaskStatus.CANCELLED)
+                cancelled += 1
+                stack.extend(sub for sub in current.subtasks if sub.id in self.tasks)
                 
-            logger.debug(f"Cancelled task: {task_id}")
+            logger.debug(f"Cancelled task: {task_id} ({cancelled} tasks including subtasks)")
             
         except Exception as e:
             logger.error(f"Failed to cancel task: {str(e)}")
@@ -195,7 +270,7 @@ class TaskManager:
                 return
                 
             if task.status == TaskStatus.RUNNING:
-                task.status = TaskStatus.PAUSED
+                self._set_status(task, TaskStatus.PAUSED)
                 self.running_tasks.remove(task_id)
                 
             logger.debug(f"Paused task: {task_id}")
@@ -210,8 +285,8 @@ class TaskManager:
             if not task or task.status != TaskStatus.PAUSED:
                 return
                 
-            task.status = TaskStatus.PENDING
-            await self.task_queue.put((task.priority, task_id))
+            self._set_status(task, TaskStatus.PENDING)
+            await self._enqueue(task)
             
             logger.debug(f"Resumed task: {task_id}")
             
@@ -225,35 +300,56 @@ class TaskManager:
     def list_tasks(self, status: Optional[TaskStatus] = None) -> List[Task]:
         """List tasks, optionally filtered by status"""
         if status:
-            return [task for task in self.tasks.values() if task.status == status]
+            # Status changes reorder the index, so restore creation order
+            return sorted(
+                (self.tasks[task_id] for task_id in self._by_status[status]),
+                key=lambda task: task.created_at
+            )
         return list(self.tasks.values())
         
-    async def process_queue(self):
-        """Process task queue"""
+    async def _worker(self):
+        """Run queued tasks one at a time"""
         while True:
             try:
                 # Get next task
-                priority, task_id = await self.task_queue.get()
+                priority, _, task_id = await self.task_queue.get()
                 
                 # Start task
-                await self.start_task(task_id)
-                
-                # Mark task as done
-                self.task_queue.task_done()
-                
+                await self._run_task(task_id)
+                    
             except Exception as e:
                 logger.error(f"Error processing task queue: {str(e)}")
                 await asyncio.sleep(1)  # Prevent tight loop on error
                 
+    async def run(self):
+        """Process the task queue with up to max_concurrent_tasks workers"""
+        self._workers = [
+            asyncio.create_task(self._worker())
+            for _ in range(self.max_concurrent_tasks)
+        ]
+        try:
+            await asyncio.gather(*self._workers)
+        finally:
+            self.shutdown()
+            
+    async def process_queue(self):
+        """Process task queue"""
+        await self.run()
+        
+    def shutdown(self):
+        """Cancel queue workers"""
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+                
     def clear_completed_tasks(self):
         """Clear completed and failed tasks"""
-        completed_ids = [
-            task_id for task_id, task in self.tasks.items()
-            if task.status in [TaskStatus.COMPLETED, TaskStatus.FAILED]
-        ]
+        completed_ids = [*self._by_status[TaskStatus.COMPLETED], *self._by_status[TaskStatus.FAILED]]
         
         for task_id in completed_ids:
             del self.tasks[task_id]
+        self._by_status[TaskStatus.COMPLETED].clear()
+        self._by_status[TaskStatus.FAILED].clear()
             
         logger.debug(f"Cleared {len(completed_ids)} completed tasks")
         
@@ -289,21 +385,25 @@ class TaskManager:
             
     def get_task_tree(self, task_id: str) -> Dict:
         """Get task and its subtasks as a tree"""
-        task = self.tasks.get(task_id)
-        if not task:
+        root = self.tasks.get(task_id)
+        if not root:
             return {}
             
-        return {
-            "id": task.id,
-            "description": task.description,
-            "status": task.status.value,
-            "created_at": task.created_at,
-            "started_at": task.started_at,
-            "completed_at": task.completed_at,
-            "error": task.error,
-            "metadata": task.metadata,
-            "subtasks": [
-                self.get_task_tree(subtask.id)
-                for subtask in task.subtasks
-            ]
-        } 
\ No newline at end of file
+        tree = {}
+        stack = [(root, tree)]
+        while stack:
+            task, node = stack.pop()
+            node.update({
+                "id": task.id,
+                "description": task.description,
+                "status": task.status.value,
+                "created_at": _format_ns(task.created_at),
+                "started_at": _format_ns(task.started_at),
+                "completed_at": _format_ns(task.completed_at),
+                "error": task.error,
+                "metadata": task.metadata,
+                "subtasks": [{} for _ in task.subtasks]
+            })
+            stack.extend(zip(task.subtasks, node["subtasks"]))
+            
+        return tree
@@ -1,27 +1,22 @@
 import pytest
-import json
+import orjson
 import os
+import re
 from pathlib import Path
 from src.config.config_manager import ConfigManager, Config
 from pydantic import ValidationError
 
-@pytest.fixture
-def temp_config_file(tmp_path):
-    """Create a temporary config file"""
-    config_file = tmp_path / "test_config.json"
-    return str(config_file)
+TEST_ENV = {
+    "ANTHROPIC_API_KEY": "test_key_for_testing",
+    "GOOGLE_TEST_EMAIL": "test@example.com",
+    "GOOGLE_TEST_PASSWORD": "test_password_12345"
+}
 
-@pytest.fixture
-def valid_config_data(monkeypatch):
-    """Fixture providing valid test configuration data"""
-    # Set environment variables for sensitive data
-    monkeypatch.setenv("ANTHROPIC_API_KEY", "test_key_for_testing")
-    monkeypatch.setenv("GOOGLE_TEST_EMAIL", "test@example.com")
-    monkeypatch.setenv("GOOGLE_TEST_PASSWORD", "test_password_12345")
-    
+def _valid_config_data():
+    """Valid test configuration data"""
     return {
         "api": {
-            "anthropic_api_key": os.getenv("ANTHROPIC_API_KEY"),
+            "anthropic_api_key": TEST_ENV["ANTHROPIC_API_KEY"],
             "requests_per_minute": 60,
             "max_retries": 3
         },
@@ -32,12 +27,34 @@ def valid_config_data(monkeypatch):
             "user_data_dir": os.path.expanduser("~/.lam/test/browser_data")
         },
         "auth": {
-            "google_email": os.getenv("GOOGLE_TEST_EMAIL"),
-            "google_password": os.getenv("GOOGLE_TEST_PASSWORD"),
+            "google_email": TEST_ENV["GOOGLE_TEST_EMAIL"],
+            "google_password": TEST_ENV["GOOGLE_TEST_PASSWORD"],
             "google_2fa_enabled": False
         }
     }
 
+# Valid config serialized once for tests that only need the raw file contents
+_CFG_BYTES = orjson.dumps(_valid_config_data())
+
+@pytest.fixture
+def valid_config_data(monkeypatch):
+    """Fixture providing valid test configuration data"""
+    # Set environment variables for sensitive data
+    for name, value in TEST_ENV.items():
+        monkeypatch.setenv(name, value)
+    
+    return _valid_config_data()
+
+@pytest.fixture(scope="module")
+def validation_manager(tmp_path_factory):
+    """Default-config manager shared by tests whose updates fail validation and are never saved"""
+    return ConfigManager(str(tmp_path_factory.mktemp("cfg") / "unused.json"))
+
+@pytest.fixture(scope="session")
+def _validated_config():
+    """Valid config validated once, tests take deep copies"""
+    return Config.model_validate(orjson.loads(_CFG_BYTES))
+
 @pytest.fixture
 def invalid_config_data():
     """Fixture providing invalid test configuration data"""
@@ -66,20 +83,18 @@ class TestConfigManager:
         assert isinstance(manager.config, Config)
         assert manager.config.api.anthropic_api_key is None
         
-    async def test_load_valid_config(self, temp_config_file, valid_config_data):
+    async def test_load_valid_config(self, temp_config_file, inmem_config_store):
         """Test loading valid configuration"""
-        with open(temp_config_file, 'w') as f:
-            json.dump(valid_config_data, f)
+        inmem_config_store[temp_config_file] = _CFG_BYTES
             
         manager = ConfigManager(temp_config_file)
-        assert manager.config.api.anthropic_api_key == os.getenv("ANTHROPIC_API_KEY")
+        assert manager.config.api.anthropic_api_key == TEST_ENV["ANTHROPIC_API_KEY"]
         assert manager.config.browser.viewport_width == 1920
-        assert manager.config.auth.google_email == os.getenv("GOOGLE_TEST_EMAIL")
+        assert manager.config.auth.google_email == TEST_ENV["GOOGLE_TEST_EMAIL"]
         
-    async def test_validation_error_on_invalid_config(self, temp_config_file, invalid_config_data):
+    async def test_validation_error_on_invalid_config(self, temp_config_file, inmem_config_store, invalid_config_data):
         """Test validation errors with invalid configuration"""
-        with open(temp_config_file, 'w') as f:
-            json.dump(invalid_config_data, f)
+        inmem_config_store[temp_config_file] = orjson.dumps(invalid_config_data)
 
         with pytest.raises(ValidationError) as exc_info:
             ConfigManager(temp_config_file)
@@ -97,46 +112,53 @@ class TestConfigManager:
             "Value error, Timeout values must be positive"
         ]
         
-        for msg in expected_messages:
-            assert any(msg in error for error in error_messages), f"Expected error message not found: {msg}"
+        # One pass over the errors with a single alternation pattern
+        pattern = re.compile("|".join(map(re.escape, expected_messages)))
+        hits = {m.group(0) for error in error_messages for m in pattern.finditer(error)}
+        missing = set(expected_messages) - hits
+        assert not missing, f"Expected error messages not found: {missing}"
         
-    async def test_update_config(self, temp_config_file, valid_config_data):
+    async def test_update_config(self, temp_config_file, inmem_config_store, valid_config_data):
         """Test updating configuration"""
         manager = ConfigManager(temp_config_file)
         
         # Update with valid data
         manager.update_config(valid_config_data)
-        assert manager.config.api.anthropic_api_key == os.getenv("ANTHROPIC_API_KEY")
+        assert manager.config.api.anthropic_api_key == TEST_ENV["ANTHROPIC_API_KEY"]
         
         # Verify file was updated
-        with open(temp_config_file, 'r') as f:
-            saved_data = json.load(f)
-            assert saved_data["api"]["anthropic_api_key"] == os.getenv("ANTHROPIC_API_KEY")
+        saved_data = orjson.loads(inmem_config_store[temp_config_file])
+        assert saved_data["api"]["anthropic_api_key"] == TEST_ENV["ANTHROPIC_API_KEY"]
 
-    async def test_validation_edge_cases(self, temp_config_file):
+    @pytest.mark.parametrize("payload,expected", [
+        (
+            {
+                'api': {'anthropic_api_key': ''},
+                'auth': {'google_email': '', 'google_password': ''},
+                'browser': {'user_data_dir': ''}
+            },
+            "cannot be empty"
+        ),
+        ({'auth': {'google_email': 'invalid-email', 'google_password': 'password123'}}, "Invalid email format"),
+        ({'auth': {'google_email': 'test@example.com', 'google_password': 'short'}}, "Password must be at least 8 characters"),
+        ({'auth': {'google_2fa_timeout': -1}}, "Timeout values must be positive"),
+        ({'browser': {'viewport_width': 100}}, "greater than or equal to 800")
+    ])
+    async def test_validation_edge_cases(self, validation_manager, payload, expected):
         """Test validation of edge cases"""
-        manager = ConfigManager(temp_config_file)
-
-        # Test empty strings
-        empty_config = {
-            'api': {'anthropic_api_key': ''},
-            'auth': {'google_email': '', 'google_password': ''},
-            'browser': {'user_data_dir': ''}
-        }
-
         with pytest.raises(ValidationError) as exc_info:
-            manager.update_config(empty_config)
+            validation_manager.update_config(payload)
 
         errors = exc_info.value.errors()
-        assert any("cannot be empty" in str(e["msg"]) for e in errors)
+        assert any(expected in str(e["msg"]) for e in errors)
 
-    async def test_reset_config(self, temp_config_file, valid_config_data):
+    async def test_reset_config(self, temp_config_file, _validated_config):
         """Test resetting configuration to defaults"""
         manager = ConfigManager(temp_config_file)
         
         # Set some values
-        manager.update_config(valid_config_data)
-        assert manager.config.api.anthropic_api_key == os.getenv("ANTHROPIC_API_KEY")
+        manager.config = _validated_config.model_copy(deep=True)
+        assert manager.config.api.anthropic_api_key == TEST_ENV["ANTHROPIC_API_KEY"]
         
         # Reset config
         manager.reset_config()
@@ -160,13 +182,13 @@ class TestConfigManager:
         assert manager.config.api.anthropic_api_key == "env_test_key"
         assert manager.config.browser.viewport_width == 1280
         
-    async def test_export_import_config(self, temp_config_file, valid_config_data, tmp_path):
+    async def test_export_import_config(self, temp_config_file, valid_config_data, export_config_path):
         """Test exporting and importing configuration"""
         manager = ConfigManager(temp_config_file)
-        manager.update_config(valid_config_data)
+        manager.update_config(valid_config_data)  # Round-trip what a real update persisted
 
         # Export config
-        export_path = tmp_path / "exported_config.json"
+        export_path = export_config_path
         manager.export_config(str(export_path))
 
         # Create new manager and import
@@ -182,19 +204,18 @@ class TestConfigManager:
         imported_config['api']['anthropic_api_key'] = '***'
         assert imported_config == original_config
         
-    async def test_sensitive_data_handling(self, temp_config_file, valid_config_data, tmp_path):
+    async def test_sensitive_data_handling(self, temp_config_file, _validated_config, export_config_path):
         """Test handling of sensitive configuration data"""
         manager = ConfigManager(temp_config_file)
-        manager.update_config(valid_config_data)
+        manager.config = _validated_config.model_copy(deep=True)
         
         # Export config
-        export_path = tmp_path / "exported_config.json"
+        export_path = export_config_path
         manager.export_config(str(export_path))
         
         # Verify sensitive data is masked
-        with open(export_path, 'r') as f:
-            exported_data = json.load(f)
-            assert exported_data["api"]["anthropic_api_key"] == "***"
+        exported_data = orjson.loads(export_path.read_bytes())
+        assert exported_data["api"]["anthropic_api_key"] == "***"
             
     async def test_prompt_templates(self, temp_config_file):
         """Test prompt template management"""
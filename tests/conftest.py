@@ -1,11 +1,14 @@
 import pytest
-import os
-import tempfile
-import json
+import orjson
 from pathlib import Path
 from typing import Dict, Any
+from uuid import uuid4
 from unittest.mock import AsyncMock, MagicMock
 from src.actions.action_cache import Action
+from src.config.config_manager import ConfigManager
+
+# Shared, read-only action returned by mocked planners
+_CLICK_ACTION = Action(type="click", selector="#test-button")
 
 def setup_async_mock_with_result(mock, method_name, result):
     """Helper to setup async mock with specific result"""
@@ -13,6 +16,13 @@ def setup_async_mock_with_result(mock, method_name, result):
     setattr(mock, method_name, async_mock)
     return async_mock
 
+def setup_async_mocks(mock, **results):
+    """Helper to setup several async mocks with results in one call"""
+    mock.configure_mock(**{
+        name: AsyncMock(return_value=result)
+        for name, result in results.items()
+    })
+
 def setup_async_mock_sequence(mock, method_name, results):
     """Helper to setup async mock with sequence of results"""
     async_mock = AsyncMock(side_effect=results)
@@ -20,17 +30,45 @@ def setup_async_mock_sequence(mock, method_name, results):
     return async_mock
 
 @pytest.fixture
-def temp_config_file():
-    """Create a temporary config file"""
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-        json.dump({}, f)
-        config_path = f.name
+def inmem_config_store(monkeypatch):
+    """Serve mem:// config paths from a dict of JSON bytes instead of disk"""
+    store = {}
+    disk_read = ConfigManager._read
+    disk_write = ConfigManager._write
     
-    yield config_path
+    def _read(self, path):
+        if path.startswith("mem://"):
+            return orjson.loads(store[path]) if path in store else None
+        return disk_read(self, path)
+        
+    def _write(self, path, data):
+        if path.startswith("mem://"):
+            store[path] = orjson.dumps(data)
+        else:
+            disk_write(self, path, data)
+            
+    monkeypatch.setattr(ConfigManager, "_read", _read)
+    monkeypatch.setattr(ConfigManager, "_write", _write)
+    return store
+
+@pytest.fixture
+def temp_config_file(inmem_config_store):
+    """Create an in-memory config file"""
+    config_path = "mem://test_config.json"
+    inmem_config_store[config_path] = b"{}"
+    return config_path
     
-    # Cleanup
-    if os.path.exists(config_path):
-        os.unlink(config_path)
+@pytest.fixture(scope="session")
+def _cfg_dir(tmp_path_factory):
+    """Session-wide directory for config files that must exist on disk"""
+    return tmp_path_factory.mktemp("cfg")
+
+@pytest.fixture
+def export_config_path(_cfg_dir):
+    """On-disk path for an exported config, removed after the test"""
+    path = _cfg_dir / f"{uuid4().hex}.json"
+    yield path
+    path.unlink(missing_ok=True)
         
 @pytest.fixture
 def valid_config_data() -> Dict[str, Any]:
@@ -103,78 +141,89 @@ def mock_config_manager(valid_config_data):
             
     return MockConfigManager()
     
-@pytest.fixture
-def mock_browser_context(mocker):
+# Browser mocks are built once per session and reset after each test
+@pytest.fixture(scope="session")
+def mock_browser_context():
     """Mock browser context for testing"""
-    context = mocker.MagicMock()
-    context.new_page = mocker.AsyncMock()
-    context.close = mocker.AsyncMock()
-    context.cookies = mocker.AsyncMock(return_value=[{"name": "test", "value": "value"}])
-    context.add_cookies = mocker.AsyncMock()
-    context.clear_cookies = mocker.AsyncMock()
+    context = MagicMock()
+    context.new_page = AsyncMock()
+    context.close = AsyncMock()
+    context.cookies = AsyncMock(return_value=[{"name": "test", "value": "value"}])
+    context.add_cookies = AsyncMock()
+    context.clear_cookies = AsyncMock()
     return context
     
-@pytest.fixture
-def mock_browser(mocker, mock_browser_context):
+@pytest.fixture(scope="session")
+def mock_browser(mock_browser_context):
     """Mock browser for testing"""
-    browser = mocker.MagicMock()
-    browser.new_context = mocker.AsyncMock(return_value=mock_browser_context)
-    browser.close = mocker.AsyncMock()
-    browser.version = mocker.AsyncMock(return_value="Chrome/100.0.0.0")
+    browser = MagicMock()
+    browser.new_context = AsyncMock(return_value=mock_browser_context)
+    browser.close = AsyncMock()
+    browser.version = AsyncMock(return_value="Chrome/100.0.0.0")
     browser.contexts = [mock_browser_context]
     return browser
     
-@pytest.fixture
-def mock_page(mocker):
+@pytest.fixture(scope="session")
+def mock_page():
     """Mock page for testing"""
-    page = mocker.MagicMock()
-    page.goto = mocker.AsyncMock()
-    page.fill = mocker.AsyncMock()
-    page.click = mocker.AsyncMock()
-    page.wait_for_selector = mocker.AsyncMock()
-    page.wait_for_navigation = mocker.AsyncMock()
-    page.evaluate = mocker.AsyncMock(return_value={"localStorage": {}, "sessionStorage": {}})
-    page.close = mocker.AsyncMock()
-    page.screenshot = mocker.AsyncMock()
-    page.set_viewport_size = mocker.AsyncMock()
-    page.viewport_size = mocker.AsyncMock(return_value={"width": 1920, "height": 1080})
+    # Spec imports live in the fixtures so conftest loads without the browser or LLM stack
+    from playwright.async_api import Page
+    page = MagicMock(spec=Page)
+    page.goto = AsyncMock()
+    page.fill = AsyncMock()
+    page.click = AsyncMock()
+    page.wait_for_selector = AsyncMock()
+    page.wait_for_navigation = AsyncMock()
+    page.evaluate = AsyncMock(return_value={"localStorage": {}, "sessionStorage": {}})
+    page.close = AsyncMock()
+    page.screenshot = AsyncMock()
+    page.set_viewport_size = AsyncMock()
+    page.viewport_size = {"width": 1920, "height": 1080}
     page.url = "https://example.com"
     
     # Mock accessibility
-    accessibility = mocker.MagicMock()
-    accessibility.snapshot = mocker.AsyncMock(return_value={"role": "main"})
+    accessibility = MagicMock()
+    accessibility.snapshot = AsyncMock(return_value={"role": "main"})
     page.accessibility = accessibility
     
     return page
     
-@pytest.fixture
-def mock_playwright(mocker, mock_browser):
+@pytest.fixture(scope="session")
+def mock_playwright(mock_browser):
     """Mock playwright for testing"""
-    playwright = mocker.MagicMock()
-    playwright.chromium = mocker.MagicMock()
-    playwright.chromium.launch = mocker.AsyncMock(return_value=mock_browser)
-    playwright.chromium.connect_over_cdp = mocker.AsyncMock(return_value=mock_browser)
-    playwright.stop = mocker.AsyncMock()
+    playwright = MagicMock()
+    playwright.chromium = MagicMock()
+    playwright.chromium.launch = AsyncMock(return_value=mock_browser)
+    playwright.chromium.connect_over_cdp = AsyncMock(return_value=mock_browser)
+    playwright.stop = AsyncMock()
     return playwright 
 
+@pytest.fixture(autouse=True)
+def _reset_mocks(request):
+    """Clear call records on the shared browser mocks a test used"""
+    yield
+    for name in ("mock_browser", "mock_page", "mock_playwright", "mock_browser_context"):
+        if name in request.fixturenames:
+            request.getfixturevalue(name).reset_mock(return_value=False, side_effect=False)
+
 @pytest.fixture
-def setup_task_executor_mocks(mock_browser_manager, mock_action_cache, mock_claude_client):
+def setup_task_executor_mocks(mock_browser_manager, mock_action_cache, mock_claude_client, mock_page):
     """Helper fixture to setup common task executor mocks"""
     def _setup(success=True, cached_sequence=None):
         # Setup browser manager
-        setup_async_mock_with_result(mock_browser_manager, "execute_action", success)
-        setup_async_mock_with_result(mock_browser_manager, "get_active_page", mock_page)
+        setup_async_mocks(mock_browser_manager, execute_action=success, get_active_page=mock_page)
         
         # Setup action cache
-        setup_async_mock_with_result(mock_action_cache, "get_similar_task", cached_sequence)
-        setup_async_mock_with_result(mock_action_cache, "store_sequence", None)
-        setup_async_mock_with_result(mock_action_cache, "update_stats", None)
+        setup_async_mocks(
+            mock_action_cache,
+            get_similar_task=cached_sequence,
+            store_sequence=None,
+            update_stats=None
+        )
         
         # Setup Claude client only if we don't have a cached sequence with high success rate
         if not cached_sequence or cached_sequence.success_rate <= 0.8:
-            setup_async_mock_with_result(mock_claude_client, "plan_actions", [
-                Action(type="click", selector="#test-button")
-            ])
+            setup_async_mock_with_result(mock_claude_client, "plan_actions", [_CLICK_ACTION])
         else:
             # Don't set up plan_actions if we have a successful cached sequence
             mock_claude_client.plan_actions = AsyncMock()
@@ -184,8 +233,10 @@ def setup_task_executor_mocks(mock_browser_manager, mock_action_cache, mock_clau
 @pytest.fixture
 def mock_browser_manager(mocker, mock_browser, mock_page):
     """Mock browser manager for testing"""
-    manager = mocker.MagicMock()
+    from src.browser.browser_manager import BrowserManager
+    manager = MagicMock(spec=BrowserManager)
     manager.browser = mock_browser
+    manager.page = mock_page
     manager.active_page = mock_page
     manager.get_active_page = mocker.AsyncMock(return_value=mock_page)
     manager.execute_action = mocker.AsyncMock(return_value=True)
@@ -205,8 +256,7 @@ def mock_action_cache(mocker):
 @pytest.fixture
 def mock_claude_client(mocker):
     """Mock Claude client for testing"""
-    client = mocker.MagicMock()
-    client.plan_actions = mocker.AsyncMock(return_value=[
-        Action(type="click", selector="#test-button")
-    ])
+    from src.llm.claude_client import ClaudeClient
+    client = MagicMock(spec=ClaudeClient)
+    client.plan_actions = mocker.AsyncMock(return_value=[_CLICK_ACTION])
     return client 
\ No newline at end of file
@@ -5,6 +5,14 @@ from src.llm.claude_client import ClaudeClient
 from src.actions.action_cache import Action
 from datetime import datetime
 
+# Shared, read-only actions returned by mocked planners
+_CLICK_ACTION = Action(type="click", selector="#test-button")
+_INTERACTION_ACTIONS = [
+    [Action(type="click", selector="#button1")],
+    [Action(type="type", selector="#input1", text="test")],
+    [Action(type="click", selector="#submit")]
+]
+
 @pytest.fixture
 def browser_manager():
     """Create a mock browser manager"""
@@ -36,9 +44,7 @@ def browser_manager():
 def claude():
     """Create a mock Claude client"""
     mock = MagicMock()
-    mock.plan_actions = AsyncMock(return_value=[
-        Action(type="click", selector="#test-button")
-    ])
+    mock.plan_actions = AsyncMock(return_value=[_CLICK_ACTION])
     return mock
 
 @pytest.mark.asyncio
@@ -83,11 +89,7 @@ async def test_execute_claude_actions(browser_manager, claude):
 async def test_complex_interaction(browser_manager, claude):
     """Test more complex interaction flow"""
     # Setup mock responses
-    claude.plan_actions.side_effect = [
-        [Action(type="click", selector="#button1")],
-        [Action(type="type", selector="#input1", text="test")],
-        [Action(type="click", selector="#submit")]
-    ]
+    claude.plan_actions.side_effect = _INTERACTION_ACTIONS
     
     # Execute multiple actions
     for request in ["Click first button", "Type test", "Submit form"]:
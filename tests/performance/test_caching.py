@@ -1,18 +1,24 @@
 import pytest
 import asyncio
+import gc
 import time
 import os
 import tempfile
+import tracemalloc
+from uuid import uuid4
 from datetime import datetime, timedelta
-import psutil
 
 from src.actions.action_cache import ActionCache, Action, ActionSequence
-from src.llm.claude_client import ClaudeClient
-from src.task.executor import TaskExecutor, GUIState
+from src.task.performance import RateLimiter
 
 @pytest.fixture
-async def test_db_path():
-    """Create a temporary database file for testing"""
+def test_db_path():
+    """Name a shared in-memory database for testing"""
+    return f"file:actioncache_{uuid4().hex}?mode=memory&cache=shared"
+
+@pytest.fixture
+def disk_db_path():
+    """Create a temporary database file for tests that need on-disk behavior"""
     with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
         db_path = f.name
     yield db_path
@@ -21,51 +27,49 @@ async def test_db_path():
 @pytest.mark.asyncio
 async def test_cache_performance(test_db_path):
     """Test cache read/write performance"""
-    db_path = await anext(test_db_path)
-    async with ActionCache(db_path=db_path) as cache:
-        # Create test data
-        sequences = []
-        for i in range(100):
-            sequences.append(ActionSequence(
-                task_key=f"task_{i}",
-                actions=[
-                    Action(type="click", selector=f"#button_{i}"),
-                    Action(type="type", selector=f"#input_{i}", text=f"test_{i}")
+    async with ActionCache(db_path=test_db_path) as cache:
+        # Create test data as rows, skipping per-row dataclass construction
+        now = datetime.now()
+        rows = [
+            ActionCache.sequence_row(
+                f"task_{i}",
+                [
+                    {"type": "click", "selector": f"#button_{i}"},
+                    {"type": "type", "selector": f"#input_{i}", "text": f"test_{i}"}
                 ],
                 success_rate=1.0,
                 execution_count=1,
                 avg_execution_time=0.5,
-                metadata={},
-                last_used=datetime.now()
-            ))
+                last_used=now
+            )
+            for i in range(100)
+        ]
         
         # Test write performance
-        start_time = datetime.now()
-        for sequence in sequences:
-            await cache.store(sequence)
-        write_time = (datetime.now() - start_time).total_seconds()
+        start_time = time.perf_counter()
+        await cache.store_raw(rows)
+        write_time = time.perf_counter() - start_time
         assert write_time < 5.0  # Should complete in reasonable time
         
         # Test read performance
-        start_time = datetime.now()
-        for i in range(100):
-            sequence = await cache.get_similar_task(f"task_{i}")
-            assert sequence is not None
-            assert len(sequence.actions) == 2
-        read_time = (datetime.now() - start_time).total_seconds()
+        start_time = time.perf_counter()
+        results = await cache.get_similar_tasks([f"task_{i}" for i in range(100)])
+        assert len(results) == 100
+        assert all(len(sequence.actions) == 2 for sequence in results.values())
+        read_time = time.perf_counter() - start_time
         assert read_time < 5.0  # Should complete in reasonable time
 
 @pytest.mark.asyncio
 async def test_cache_memory_usage(test_db_path):
     """Test cache memory efficiency"""
-    db_path = await anext(test_db_path)
-    async with ActionCache(db_path=db_path) as cache:
-        process = psutil.Process(os.getpid())
-        initial_memory = process.memory_info().rss
+    async with ActionCache(db_path=test_db_path) as cache:
+        # Trace Python allocations directly, RSS is dominated by allocator noise
+        gc.collect()
+        tracemalloc.start()
         
         # Store large number of sequences
-        for i in range(1000):
-            sequence = ActionSequence(
+        await cache.store_many([
+            ActionSequence(
                 task_key=f"large_task_{i}",
                 actions=[Action(type="click", selector=f"#{j}") for j in range(10)],
                 success_rate=1.0,
@@ -74,19 +78,20 @@ async def test_cache_memory_usage(test_db_path):
                 metadata={"large": "data" * 100},  # Large metadata
                 last_used=datetime.now()
             )
-            await cache.store(sequence)
+            for i in range(1000)
+        ])
         
-        final_memory = process.memory_info().rss
-        memory_increase = (final_memory - initial_memory) / 1024 / 1024  # MB
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        memory_increase = peak / 1024 / 1024  # MB
         
-        # Assert reasonable memory usage (less than 100MB increase)
-        assert memory_increase < 100
+        # Assert reasonable memory usage (less than 25MB peak)
+        assert memory_increase < 25
 
 @pytest.mark.asyncio
 async def test_claude_rate_limiting(test_db_path):
     """Test rate limiting for Claude API requests"""
-    db_path = await anext(test_db_path)
-    async with ActionCache(db_path=db_path) as cache:
+    async with ActionCache(db_path=test_db_path) as cache:
         # Create test data
         sequence = ActionSequence(
             task_key="test_task",
@@ -101,11 +106,22 @@ async def test_claude_rate_limiting(test_db_path):
             last_used=datetime.now()
         )
 
+        # Pace requests on a virtual clock that only the limiter's waits advance
+        clock = [0.0]
+
+        async def fake_sleep(seconds):
+            clock[0] += seconds
+
+        rate_limiter = RateLimiter(max_actions=5, time_window=1, clock=lambda: clock[0], sleep=fake_sleep)
+
         # Test rapid requests
         for i in range(10):
+            await rate_limiter.acquire()
             sequence.task_key = f"task_{i}"
             await cache.store(sequence)
-            await asyncio.sleep(0.1)  # Small delay between requests
+
+        # Second burst of five had to wait out one window
+        assert clock[0] == 1.0
 
         # Verify cache state
         stats = await cache.get_stats()
@@ -113,10 +129,20 @@ async def test_claude_rate_limiting(test_db_path):
         assert stats["avg_success_rate"] == 1.0
 
 @pytest.mark.asyncio
-async def test_concurrent_cache_access(test_db_path):
-    """Test concurrent cache access"""
-    db_path = await anext(test_db_path)
-    async with ActionCache(db_path=db_path) as cache:
+async def test_concurrent_cache_access(disk_db_path, monkeypatch):
+    """Test concurrent cache access through the WAL writer and reader pool"""
+    async with ActionCache(db_path=disk_db_path) as cache:
+        # Record the size of every batch the drainer commits
+        batch_sizes = []
+        executemany = cache._write_cursor.executemany
+        
+        async def spy_executemany(sql, rows):
+            rows = list(rows)
+            batch_sizes.append(len(rows))
+            return await executemany(sql, rows)
+            
+        monkeypatch.setattr(cache._write_cursor, "executemany", spy_executemany)
+        
         async def write_task(i):
             sequence = ActionSequence(
                 task_key=f"concurrent_task_{i}",
@@ -127,56 +153,48 @@ async def test_concurrent_cache_access(test_db_path):
                 metadata={},
                 last_used=datetime.now()
             )
-            await cache.store(sequence)
-            return await cache.get_similar_task(sequence.task_key)
+            # Write on the writer connection, read back on a pooled reader
+            await cache.store_queued(sequence)
+            cache._hot.clear()  # Make the read go to SQLite
+            results = await cache.get_similar_tasks([sequence.task_key])
+            return results.get(sequence.task_key)
         
-        # Run concurrent operations
-        tasks = [write_task(i) for i in range(50)]
-        results = await asyncio.gather(*tasks)
+        # Run concurrent operations, writes are committed in shared batches
+        results = await asyncio.gather(*(write_task(i) for i in range(50)))
         
         # Verify all operations succeeded
         assert all(r is not None for r in results)
         assert len(results) == 50
+        assert sum(batch_sizes) == 50
+        assert len(batch_sizes) < 50
+        # Reads overlapped, so the pool opened readers beside the writer
+        assert cache._pool._size > 1
 
 @pytest.mark.asyncio
-async def test_cache_cleanup(test_db_path):
+async def test_cache_cleanup(disk_db_path):
     """Test cache cleanup performance"""
-    db_path = await anext(test_db_path)
-    async with ActionCache(db_path=db_path) as cache:
-        # Store sequences with old timestamps
+    async with ActionCache(db_path=disk_db_path) as cache:
+        # Store sequences with old and recent timestamps as raw rows in one batch
         old_time = datetime.now() - timedelta(days=30)
-        for i in range(100):
-            sequence = ActionSequence(
-                task_key=f"old_task_{i}",
-                actions=[Action(type="click", selector=f"#button_{i}")],
+        await cache.store_raw([
+            ActionCache.sequence_row(
+                f"{prefix}_task_{i}",
+                [{"type": "click", "selector": f"#button_{i}"}],
                 success_rate=1.0,
                 execution_count=1,
                 avg_execution_time=0.5,
-                metadata={},
-                last_used=old_time
+                last_used=last_used
             )
-            await cache.store(sequence)
-        
-        # Store sequences with recent timestamps
-        for i in range(100):
-            sequence = ActionSequence(
-                task_key=f"new_task_{i}",
-                actions=[Action(type="click", selector=f"#button_{i}")],
-                success_rate=1.0,
-                execution_count=1,
-                avg_execution_time=0.5,
-                metadata={},
-                last_used=datetime.now()
-            )
-            await cache.store(sequence)
-        
-        # Measure cleanup performance
-        start_time = time.time()
+            for prefix, last_used in (("old", old_time), ("new", datetime.now()))
+            for i in range(100)
+        ])
         stats_before = await cache.get_stats()
         
+        # Measure cleanup performance alone
+        start_time = time.perf_counter()
         await cache.cleanup(max_age_days=7)
+        cleanup_time = time.perf_counter() - start_time
         
-        cleanup_time = time.time() - start_time
         stats_after = await cache.get_stats()
         
         # Verify cleanup performance and results
@@ -1,23 +1,39 @@
 import pytest
+import pytest_asyncio
+import asyncio
 import os
 import tempfile
+from uuid import uuid4
 from datetime import datetime, timedelta
 from src.actions.action_cache import ActionCache, Action, ActionSequence
 
+# One event loop for the module so the shared cache's connection outlives each test
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+@pytest.fixture(scope="session")
+def test_db_path():
+    """Name a shared in-memory database for testing"""
+    return f"file:actioncache_{uuid4().hex}?mode=memory&cache=shared"
+
 @pytest.fixture
-async def test_db_path():
-    """Create a temporary database file for testing"""
+def disk_db_path():
+    """Create a temporary database file for tests that need on-disk behavior"""
     with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
         db_path = f.name
     yield db_path
     os.unlink(db_path)
 
-@pytest.fixture
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
 async def action_cache(test_db_path):
-    """Create an ActionCache instance for testing"""
-    cache = ActionCache(db_path=test_db_path)
-    yield cache
-    await cache.clear()
+    """ActionCache shared by all tests, emptied between them"""
+    async with ActionCache(db_path=test_db_path) as cache:
+        yield cache
+
+@pytest_asyncio.fixture(autouse=True, loop_scope="session")
+async def _truncate(action_cache):
+    """Empty the shared cache after each test"""
+    yield
+    await action_cache.clear()
 
 @pytest.fixture
 def sample_action_sequence():
@@ -37,132 +53,138 @@ def sample_action_sequence():
         last_used=datetime.now()
     )
 
-@pytest.mark.asyncio
-async def test_store_and_retrieve(test_db_path):
+async def test_store_and_retrieve(action_cache):
     """Test storing and retrieving an action sequence"""
-    db_path = await anext(test_db_path)
-    async with ActionCache(db_path=db_path) as cache:
-        # Create test sequence
-        actions = [
-            Action(type="click", selector="#test-button"),
-            Action(type="type", selector="#test-input", text="test"),
-            Action(type="wait", timeout=1000)
-        ]
-        sequence = ActionSequence(
-            task_key="test_task",
-            actions=actions,
-            success_rate=0.0,
-            execution_count=0,
-            avg_execution_time=0.0,
-            metadata={},
-            last_used=datetime.now()
-        )
-        
-        # Store sequence
-        await cache.store(sequence)
-        
-        # Retrieve sequence
-        retrieved = await cache.get_similar_task(sequence.task_key)
-        
-        assert retrieved is not None
-        assert retrieved.task_key == sequence.task_key
-        assert len(retrieved.actions) == len(sequence.actions)
-        assert retrieved.actions[0].type == "click"
-        assert retrieved.actions[0].selector == "#test-button"
-
-@pytest.mark.asyncio
-async def test_update_stats(test_db_path):
+    # Create test sequence
+    actions = [
+        Action(type="click", selector="#test-button"),
+        Action(type="type", selector="#test-input", text="test"),
+        Action(type="wait", timeout=1000)
+    ]
+    sequence = ActionSequence(
+        task_key="test_task",
+        actions=actions,
+        success_rate=1.0,
+        execution_count=0,
+        avg_execution_time=0.0,
+        metadata={},
+        last_used=datetime.now()
+    )
+    
+    # Store sequence
+    await action_cache.store(sequence)
+    
+    # Retrieve sequence
+    retrieved = await action_cache.get_similar_task(sequence.task_key)
+    
+    assert retrieved is not None
+    assert retrieved.task_key == sequence.task_key
+    assert len(retrieved.actions) == len(sequence.actions)
+    assert retrieved.actions[0].type == "click"
+    assert retrieved.actions[0].selector == "#test-button"
+
+async def test_update_stats(action_cache):
     """Test updating statistics for a stored sequence"""
-    db_path = await anext(test_db_path)
-    async with ActionCache(db_path=db_path) as cache:
-        # Create and store sequence
-        actions = [Action(type="click", selector="#test-button")]
-        sequence = ActionSequence(
-            task_key="test_task",
-            actions=actions,
-            success_rate=0.0,
-            execution_count=0,
-            avg_execution_time=0.0,
-            metadata={},
-            last_used=datetime.now()
-        )
-        await cache.store(sequence)
-        
-        # Update stats
-        await cache.update_stats(sequence.task_key, 1.5, True)
-        
-        # Verify stats
-        retrieved = await cache.get_similar_task(sequence.task_key)
-        assert retrieved is not None
-        assert retrieved.success_rate > 0
-        assert retrieved.execution_count == 1
-        assert retrieved.avg_execution_time == 1.5
-
-@pytest.mark.asyncio
-async def test_clear_cache(test_db_path):
+    # Create and store sequence
+    actions = [Action(type="click", selector="#test-button")]
+    sequence = ActionSequence(
+        task_key="test_task",
+        actions=actions,
+        success_rate=0.0,
+        execution_count=0,
+        avg_execution_time=0.0,
+        metadata={},
+        last_used=datetime.now()
+    )
+    await action_cache.store(sequence)
+    
+    # Update stats
+    await action_cache.update_stats(sequence.task_key, 1.5, True)
+    
+    # Verify stats
+    retrieved = (await action_cache.get_similar_tasks([sequence.task_key])).get(sequence.task_key)
+    assert retrieved is not None
+    assert retrieved.success_rate > 0
+    assert retrieved.execution_count == 1
+    assert retrieved.avg_execution_time == 1.5
+
+async def test_update_stats_running_averages(action_cache):
+    """Test that each update folds into the running success rate and execution time"""
+    actions = [Action(type="click", selector="#test-button")]
+    await action_cache.store(ActionSequence(
+        task_key="test_task",
+        actions=actions,
+        success_rate=1.0,
+        execution_count=2,
+        avg_execution_time=2.0,
+        last_used=datetime.now()
+    ))
+    
+    await action_cache.update_stats("test_task", 5.0, False)
+    await action_cache.update_stats("test_task", 1.0, True)
+    
+    retrieved = (await action_cache.get_similar_tasks(["test_task"]))["test_task"]
+    assert retrieved.execution_count == 4
+    assert retrieved.success_rate == pytest.approx(0.75)  # (1 + 1 + 0 + 1) / 4
+    assert retrieved.avg_execution_time == pytest.approx(2.5)  # (2 + 2 + 5 + 1) / 4
+
+async def test_clear_cache(action_cache):
     """Test clearing the cache"""
-    db_path = await anext(test_db_path)
-    async with ActionCache(db_path=db_path) as cache:
-        # Create and store sequence
-        actions = [Action(type="click", selector="#test-button")]
-        sequence = ActionSequence(
-            task_key="test_task",
-            actions=actions,
-            success_rate=0.0,
-            execution_count=0,
-            avg_execution_time=0.0,
-            metadata={},
-            last_used=datetime.now()
-        )
-        await cache.store(sequence)
-        
-        # Clear cache
-        await cache.clear()
-        
-        # Verify sequence is gone
-        retrieved = await cache.get_similar_task(sequence.task_key)
-        assert retrieved is None
+    # Create and store sequence
+    actions = [Action(type="click", selector="#test-button")]
+    sequence = ActionSequence(
+        task_key="test_task",
+        actions=actions,
+        success_rate=0.0,
+        execution_count=0,
+        avg_execution_time=0.0,
+        metadata={},
+        last_used=datetime.now()
+    )
+    await action_cache.store(sequence)
+    
+    # Clear cache
+    await action_cache.clear()
+    
+    # Verify sequence is gone
+    retrieved = await action_cache.get_similar_task(sequence.task_key)
+    assert retrieved is None
 
-@pytest.mark.asyncio
-async def test_get_stats(test_db_path):
+async def test_get_stats(action_cache):
     """Test retrieving cache statistics"""
-    db_path = await anext(test_db_path)
-    async with ActionCache(db_path=db_path) as cache:
-        # Create and store sequence
-        actions = [Action(type="click", selector="#test-button")]
-        sequence = ActionSequence(
-            task_key="test_task",
-            actions=actions,
-            success_rate=0.0,
-            execution_count=0,
-            avg_execution_time=0.0,
-            metadata={},
-            last_used=datetime.now()
-        )
-        await cache.store(sequence)
-        
-        # Update stats
-        await cache.update_stats(sequence.task_key, 1.5, True)
-        
-        # Get stats
-        stats = await cache.get_stats()
-        
-        assert stats["total_sequences"] == 1
-        assert stats["avg_success_rate"] == 1.0
-        assert stats["avg_executions"] == 1
-        assert stats["avg_execution_time"] == 1.5
+    # Create and store sequence
+    actions = [Action(type="click", selector="#test-button")]
+    sequence = ActionSequence(
+        task_key="test_task",
+        actions=actions,
+        success_rate=0.0,
+        execution_count=0,
+        avg_execution_time=0.0,
+        metadata={},
+        last_used=datetime.now()
+    )
+    await action_cache.store(sequence)
+    
+    # Update stats
+    await action_cache.update_stats(sequence.task_key, 1.5, True)
+    
+    # Get stats
+    stats = await action_cache.get_stats()
+    
+    assert stats["total_sequences"] == 1
+    assert stats["avg_success_rate"] == 1.0
+    assert stats["avg_executions"] == 1
+    assert stats["avg_execution_time"] == 1.5
 
-@pytest.mark.asyncio
-async def test_cleanup(test_db_path):
+async def test_cleanup(disk_db_path):
     """Test cleaning up old cache entries"""
-    db_path = await anext(test_db_path)
-    async with ActionCache(db_path=db_path) as cache:
+    async with ActionCache(db_path=disk_db_path) as cache:
         # Create old sequence
         actions = [Action(type="click", selector="#test-button")]
         old_sequence = ActionSequence(
             task_key="old_task",
             actions=actions,
-            success_rate=0.0,
+            success_rate=1.0,
             execution_count=0,
             avg_execution_time=0.0,
             metadata={},
@@ -174,7 +196,7 @@ async def test_cleanup(test_db_path):
         recent_sequence = ActionSequence(
             task_key="recent_task",
             actions=actions,
-            success_rate=0.0,
+            success_rate=1.0,
             execution_count=0,
             avg_execution_time=0.0,
             metadata={},
@@ -192,22 +214,106 @@ async def test_cleanup(test_db_path):
         assert old_retrieved is None
         assert recent_retrieved is not None
 
-@pytest.mark.asyncio
-async def test_store_sequence(test_db_path):
+async def test_store_sequence(action_cache):
     """Test storing a sequence using store_sequence helper"""
-    db_path = await anext(test_db_path)
-    async with ActionCache(db_path=db_path) as cache:
-        actions = [
-            Action(type="click", selector="#test-button"),
-            Action(type="type", selector="#test-input", text="test")
-        ]
-        
-        # Store sequence
-        await cache.store_sequence("test_task", actions)
-        
-        # Verify sequence was stored
-        retrieved = await cache.get_similar_task("test_task")
-        assert retrieved is not None
-        assert len(retrieved.actions) == 2
-        assert retrieved.actions[0].type == "click"
-        assert retrieved.actions[1].type == "type" 
\ No newline at end of file
+    actions = [
+        Action(type="click", selector="#test-button"),
+        Action(type="type", selector="#test-input", text="test")
+    ]
+    
+    # Store sequence
+    await action_cache.store_sequence("test_task", actions)
+    
+    # Verify sequence was stored
+    retrieved = (await action_cache.get_similar_tasks(["test_task"])).get("test_task")
+    assert retrieved is not None
+    assert len(retrieved.actions) == 2
+    assert retrieved.actions[0].type == "click"
+    assert retrieved.actions[1].type == "type"
+
+async def test_store_many(action_cache):
+    """Test storing several sequences in one batch"""
+    sequences = [
+        ActionSequence(
+            task_key=f"task_{i}",
+            actions=[Action(type="click", selector=f"#button_{i}")],
+            success_rate=1.0,
+            execution_count=1,
+            avg_execution_time=0.5,
+            metadata={},
+            last_used=datetime.now()
+        )
+        for i in range(5)
+    ]
+    await action_cache.store_many(sequences)
+    
+    stats = await action_cache.get_stats()
+    assert stats["total_sequences"] == 5
+    assert stats["avg_success_rate"] == 1.0
+
+async def test_close_flushes_queued_writes(disk_db_path):
+    """Test that closing the cache commits writes still waiting in the queue"""
+    actions = [Action(type="click", selector="#test-button")]
+    cache = ActionCache(db_path=disk_db_path)
+    writes = [
+        asyncio.create_task(cache.store_queued(
+            ActionSequence(task_key=f"queued_{i}", actions=actions, last_used=datetime.now())
+        ))
+        for i in range(3)
+    ]
+    await asyncio.sleep(0)  # Let the writes reach the queue
+    await cache.close()
+    
+    await asyncio.wait_for(asyncio.gather(*writes), timeout=5)
+    async with ActionCache(db_path=disk_db_path) as reopened:
+        results = await reopened.get_similar_tasks([f"queued_{i}" for i in range(3)])
+    assert len(results) == 3
+
+async def test_get_similar_tasks(action_cache):
+    """Test batch retrieval of stored sequences by task key"""
+    actions = [Action(type="click", selector="#test-button")]
+    await action_cache.store_many([
+        ActionSequence(task_key=f"task_{i}", actions=actions, last_used=datetime.now())
+        for i in range(3)
+    ])
+    
+    results = await action_cache.get_similar_tasks(["task_0", "task_2", "missing_task"])
+    
+    assert set(results) == {"task_0", "task_2"}
+    assert results["task_0"].actions[0].selector == "#test-button"
+
+async def test_get_similar_tasks_scoped_to_user(action_cache, monkeypatch):
+    """Test that batch lookups only return the current user's rows from SQLite"""
+    actions = [Action(type="click", selector="#test-button")]
+    await action_cache.store(ActionSequence(task_key="shared_task", actions=actions, last_used=datetime.now()))
+    action_cache._hot.clear()
+    
+    monkeypatch.setattr(action_cache, "current_user_id", "other_user")
+    assert await action_cache.get_similar_tasks(["shared_task"]) == {}
+
+async def test_hot_cache_evicts_least_recent(action_cache, monkeypatch):
+    """Test that the in-process cache keeps only the most recently used sequences"""
+    monkeypatch.setattr("src.actions.action_cache.HOT_CACHE_SIZE", 2)
+    actions = [Action(type="click", selector="#test-button")]
+    for key in ("task_a", "task_b"):
+        await action_cache.store(ActionSequence(task_key=key, actions=actions, success_rate=1.0, last_used=datetime.now()))
+    
+    # Touch task_a so task_b becomes least recently used
+    assert await action_cache.get_similar_task("task_a") is not None
+    await action_cache.store(ActionSequence(task_key="task_c", actions=actions, success_rate=1.0, last_used=datetime.now()))
+    
+    user_id = action_cache.current_user_id
+    assert list(action_cache._hot) == [(user_id, "task_a"), (user_id, "task_c")]
+
+async def test_hot_cache_scoped_and_thresholded(action_cache, monkeypatch):
+    """Test that hot hits respect the success threshold and the current user"""
+    actions = [Action(type="click", selector="#test-button")]
+    await action_cache.store(ActionSequence(task_key="unreliable", actions=actions, success_rate=0.5))
+    await action_cache.store(ActionSequence(task_key="reliable", actions=actions, success_rate=0.9))
+    
+    assert await action_cache.get_similar_task("unreliable") is None
+    assert await action_cache.get_similar_task("reliable") is not None
+    
+    monkeypatch.setattr(action_cache, "current_user_id", "other_user")
+    assert await action_cache.get_similar_task("reliable") is None
+
@@ -1,5 +1,6 @@
 import pytest
-from unittest.mock import AsyncMock, MagicMock, patch
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
 from src.llm.claude_client import ClaudeClient
 from src.actions.action_cache import Action
 
@@ -7,12 +8,13 @@ from src.actions.action_cache import Action
 def mock_anthropic():
     """Fixture that provides a mock Anthropic client without default responses"""
     with patch('anthropic.AsyncAnthropic') as mock:
-        mock_instance = MagicMock()
-        mock_instance.messages = MagicMock()
-        mock_instance.messages.create = AsyncMock()
-        mock.return_value = mock_instance
+        mock.return_value = SimpleNamespace(messages=SimpleNamespace(create=AsyncMock()))
         yield mock
 
+def _response(text):
+    """Plain Anthropic-shaped message with a single text block"""
+    return SimpleNamespace(content=[SimpleNamespace(text=text)])
+
 @pytest.fixture
 def claude_client(mock_anthropic):
     """Fixture that provides a Claude client with mocked Anthropic instance"""
@@ -39,13 +41,7 @@ def sample_gui_state():
 @pytest.mark.asyncio
 async def test_plan_actions_success(claude_client, mock_anthropic, sample_gui_state):
     """Test successful action planning with valid response"""
-    mock_response = MagicMock()
-    mock_response.content = [
-        MagicMock(
-            text='[{"type": "click", "selector": "#test-button"}]'
-        )
-    ]
-    mock_anthropic.return_value.messages.create.return_value = mock_response
+    mock_anthropic.return_value.messages.create.return_value = _response('[{"type": "click", "selector": "#test-button"}]')
 
     actions = await claude_client.plan_actions('Click the button', sample_gui_state)
     assert actions is not None
@@ -56,13 +52,7 @@ async def test_plan_actions_success(claude_client, mock_anthropic, sample_gui_st
 @pytest.mark.asyncio
 async def test_plan_actions_invalid_json(claude_client, mock_anthropic, sample_gui_state):
     """Test handling invalid JSON response"""
-    mock_response = MagicMock()
-    mock_response.content = [
-        MagicMock(
-            text='invalid json'
-        )
-    ]
-    mock_anthropic.return_value.messages.create.return_value = mock_response
+    mock_anthropic.return_value.messages.create.return_value = _response('invalid json')
 
     actions = await claude_client.plan_actions('Click the button', sample_gui_state)
     assert actions is None
@@ -70,13 +60,7 @@ async def test_plan_actions_invalid_json(claude_client, mock_anthropic, sample_g
 @pytest.mark.asyncio
 async def test_plan_actions_missing_fields(claude_client, mock_anthropic, sample_gui_state):
     """Test handling response with missing required fields"""
-    mock_response = MagicMock()
-    mock_response.content = [
-        MagicMock(
-            text='[{"type": "click"}]'
-        )
-    ]
-    mock_anthropic.return_value.messages.create.return_value = mock_response
+    mock_anthropic.return_value.messages.create.return_value = _response('[{"type": "click"}]')
 
     actions = await claude_client.plan_actions('Click the button', sample_gui_state)
     assert actions is None
@@ -0,0 +1,53 @@
+import pytest
+from src.task.context_budget import ContextBudget, estimate_tokens
+
+@pytest.fixture
+def large_context():
+    """Context whose history alone exceeds a small budget"""
+    return {
+        "task": "find GBP/USD",
+        "gui_state": {"url": "https://example.com", "elements": [{"text": "x" * 40}]},
+        "action_history": [{"type": "click", "selector": f"#button_{i}"} for i in range(50)]
+    }
+
+def test_estimate_tokens():
+    """Test token estimation from compact JSON size"""
+    assert estimate_tokens({"a": "b" * 400}) == len('{"a":""}' + "b" * 400) // 4
+    assert estimate_tokens(object()) > 0  # Serialized through default=str
+
+def test_estimate_tokens_unserializable():
+    """Test the str() fallback for values orjson rejects even with a default"""
+    context = {"big": 2 ** 70}  # Wider than 64 bits
+    assert estimate_tokens(context) == len(str(context)) // 4
+
+def test_context_within_budget_unchanged(large_context):
+    """Test that context within budget is returned as-is"""
+    budget = ContextBudget(max_tokens=100000)
+    history = list(large_context["action_history"])
+
+    result = budget.apply(large_context)
+    assert result["action_history"] == history
+
+def test_history_truncated_first(large_context):
+    """Test that oldest history is dropped before touching GUI state"""
+    budget = ContextBudget(max_tokens=200)
+    strict_gui_state = lambda: pytest.fail("GUI state should not be reduced")
+
+    result = budget.apply(large_context, strict_gui_state=strict_gui_state)
+    assert budget.fits(result)
+    assert result["action_history"]
+    assert result["action_history"][-1]["selector"] == "#button_49"
+
+def test_cascade_to_summarize(large_context):
+    """Test that summarize runs only when other stages are not enough"""
+    budget = ContextBudget(max_tokens=5)
+    calls = []
+
+    def summarize(context):
+        calls.append(context)
+        return {"task": context["task"]}
+
+    result = budget.apply(large_context, strict_gui_state=lambda: {"url": "https://example.com"}, summarize=summarize)
+    assert result == {"task": "find GBP/USD"}
+    assert calls[0]["action_history"] == []
+    assert calls[0]["gui_state"] == {"url": "https://example.com"}
@@ -0,0 +1,36 @@
+import asyncio
+import pytest
+from src.task.performance import PerformanceMonitor
+
+@pytest.fixture
+def monitor():
+    """Create performance monitor instance"""
+    return PerformanceMonitor()
+
+@pytest.mark.asyncio
+async def test_parallel_actions_tracked(monitor):
+    """Test that actions finishing concurrently are all counted"""
+    async def action(duration):
+        await asyncio.sleep(0)
+        monitor.track_action(duration)
+
+    await asyncio.gather(*(action(d) for d in (0.5, 1.0, 1.5, 2.0, 5.0)))
+
+    stats = monitor.get_stats()
+    assert stats["total_actions"] == 5
+    assert stats["avg_duration"] == pytest.approx(2.0)
+    assert stats["max_duration"] == 5.0
+
+def test_errors_counted_by_type(monitor):
+    """Test that errors are grouped by type"""
+    monitor.track_action(0.1)
+    for error_type in ("timeout", "timeout", "selector"):
+        monitor.track_error(error_type)
+
+    stats = monitor.get_stats()
+    assert stats["error_count"] == 3
+    assert stats["error_types"] == {"timeout": 2, "selector": 1}
+
+def test_no_stats_before_first_action(monitor):
+    """Test that an idle monitor reports nothing"""
+    assert monitor.get_stats() == {}
@@ -0,0 +1,42 @@
+import pytest
+from src.task.performance import RateLimiter
+
+@pytest.fixture
+def fake_clock():
+    """Virtual clock advanced only by the limiter's sleeps"""
+    return [0.0]
+
+@pytest.fixture
+def rate_limiter(fake_clock):
+    """Create rate limiter on a virtual clock"""
+    async def fake_sleep(seconds):
+        fake_clock[0] += seconds
+
+    return RateLimiter(
+        max_actions=2,
+        time_window=5,
+        clock=lambda: fake_clock[0],
+        sleep=fake_sleep
+    )
+
+@pytest.mark.asyncio
+async def test_acquire_within_limit(rate_limiter, fake_clock):
+    """Test that actions within the limit don't wait"""
+    await rate_limiter.acquire()
+    await rate_limiter.acquire()
+    assert fake_clock[0] == 0.0
+
+@pytest.mark.asyncio
+async def test_acquire_waits_for_window(rate_limiter, fake_clock):
+    """Test that exceeding the limit waits for the window to pass"""
+    for _ in range(3):
+        await rate_limiter.acquire()
+    assert fake_clock[0] == 5.0
+    assert len(rate_limiter.action_times) == 1
+
+@pytest.mark.asyncio
+async def test_lock_created_on_first_acquire(rate_limiter):
+    """Test that the lock is built inside the running loop, not at construction"""
+    assert rate_limiter._lock is None
+    await rate_limiter.acquire()
+    assert rate_limiter._lock is not None
@@ -0,0 +1,179 @@
+import asyncio
+import orjson
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from src.task.state import STATE_CACHE_TTL, STATE_HISTORY_SIZE, GUIState, StateManager, _myers_diff
+
+def make_state(*elements):
+    """Build a GUIState from (tag, id, text) tuples"""
+    return GUIState(
+        url="https://example.com",
+        title="Example",
+        viewport={"width": 1280, "height": 720},
+        tags=[tag for tag, _, _ in elements],
+        ids=[el_id for _, el_id, _ in elements],
+        texts=[text for _, _, text in elements],
+        selectors=[f"#{el_id}" if el_id else tag.lower() for tag, el_id, _ in elements]
+    )
+
+@pytest.fixture
+def state_manager():
+    """Create state manager instance"""
+    return StateManager()
+
+def test_myers_diff_minimal():
+    """Test that only real changes are reported"""
+    deleted, inserted = _myers_diff(list("abcabba"), list("cbabac"))
+    assert len(deleted) + len(inserted) == 5
+    assert deleted == sorted(deleted)
+    assert inserted == sorted(inserted)
+
+def test_myers_diff_unchanged():
+    """Test that identical sequences produce no edits"""
+    assert _myers_diff(list("abc"), list("abc")) == ([], [])
+
+def test_state_diff_added_removed(state_manager):
+    """Test added and removed elements"""
+    before = make_state(("DIV", "a", "one"), ("DIV", "b", "two"))
+    after = make_state(("DIV", "a", "one"), ("SPAN", "c", "three"))
+
+    diff = state_manager.get_state_diff(before, after)
+    assert [el.id for el in diff["elements_added"]] == ["c"]
+    assert [el.id for el in diff["elements_removed"]] == ["b"]
+    assert diff["elements_moved"] == []
+
+def test_state_diff_detects_moves(state_manager):
+    """Test that a reordered element is reported as moved, not added and removed"""
+    before = make_state(("LI", "", "first"), ("LI", "", "second"), ("LI", "", "third"))
+    after = make_state(("LI", "", "second"), ("LI", "", "third"), ("LI", "", "first"))
+
+    diff = state_manager.get_state_diff(before, after)
+    assert diff["elements_added"] == []
+    assert diff["elements_removed"] == []
+    assert len(diff["elements_moved"]) == 1
+    moved = diff["elements_moved"][0]
+    assert (moved["element"].text, moved["from_index"], moved["to_index"]) == ("first", 0, 2)
+
+def test_state_to_bytes():
+    """Test that state serializes with column-wise elements"""
+    state = make_state(("DIV", "a", "one"), ("SPAN", "", None))
+
+    data = orjson.loads(state.to_bytes())
+    assert data["url"] == "https://example.com"
+    assert data["elements"]["tags"] == ["DIV", "SPAN"]
+    assert data["elements"]["texts"] == ["one", None]
+    assert data["ts"] == state.timestamp.timestamp()
+
+def test_state_history_bounded():
+    """Test that state history evicts the oldest snapshots"""
+    manager = StateManager(history_size=2)
+    states = [make_state(("DIV", str(i), "")) for i in range(3)]
+    for state in states:
+        manager.state_history.append(state)
+
+    assert list(manager.state_history) == states[1:]
+
+def make_snapshot_page(nodes):
+    """Build a page whose CDP snapshot holds (name, parent, text, visibility, opacity) nodes"""
+    strings = []
+    def intern(value):
+        if value not in strings:
+            strings.append(value)
+        return strings.index(value)
+    snapshot = {
+        "strings": strings,
+        "documents": [{
+            "title": intern("Example"),
+            "nodes": {
+                "nodeName": [intern(name) for name, _, _, _, _ in nodes],
+                "nodeType": [3 if name == "#text" else 1 for name, _, _, _, _ in nodes],
+                "parentIndex": [parent for _, parent, _, _, _ in nodes]
+            },
+            "layout": {
+                "nodeIndex": list(range(len(nodes))),
+                "bounds": [[0, 0, 10, 10]] * len(nodes),
+                "text": [intern(text) if text else -1 for _, _, text, _, _ in nodes],
+                "styles": [[intern(vis), intern(opacity)] for _, _, _, vis, opacity in nodes]
+            }
+        }]
+    }
+    cdp = SimpleNamespace(send=AsyncMock(return_value=snapshot), detach=AsyncMock())
+    context = SimpleNamespace(new_cdp_session=AsyncMock(return_value=cdp))
+    return SimpleNamespace(
+        url="https://example.com",
+        context=context,
+        viewport_size={"width": 1280, "height": 720},
+        once=MagicMock(),
+        evaluate=AsyncMock()
+    )
+
+@pytest.mark.asyncio
+async def test_snapshot_matches_inner_text(state_manager):
+    """Test that CDP capture skips hidden nodes and credits descendant text"""
+    page = make_snapshot_page([
+        ("BODY", -1, None, "visible", "1"),
+        ("DIV", 0, None, "visible", "1"),
+        ("#text", 1, "Hello ", "visible", "1"),
+        ("SPAN", 1, None, "visible", "1"),
+        ("#text", 3, "world", "visible", "1"),
+        ("P", 0, None, "hidden", "1"),
+        ("#text", 5, "secret", "hidden", "1"),
+        ("P", 0, None, "visible", "0"),
+        ("SPAN", 7, None, "visible", "1"),
+        ("#text", 8, "ghost", "visible", "1"),
+    ])
+
+    columns = await state_manager._capture_snapshot(page)
+    assert columns["tags"] == ["BODY", "DIV", "SPAN"]
+    assert columns["texts"] == ["Hello world", "Hello world", "world"]
+
+@pytest.mark.asyncio
+async def test_state_caching(state_manager):
+    """Test that captures are reused until the cache expires"""
+    page = make_snapshot_page([("BODY", -1, None, "visible", "1")])
+    fake_clock = [0.0]
+    state_manager._now = lambda: fake_clock[0]
+
+    state1 = await state_manager.capture_state(page)
+    state2 = await state_manager.capture_state(page)
+    assert state1 is state2
+
+    fake_clock[0] += STATE_CACHE_TTL
+    state3 = await state_manager.capture_state(page)
+    assert state3 is not state1
+    # Both captures went through the one CDP session opened for the page
+    assert page.context.new_cdp_session.await_count == 1
+    cdp = page.context.new_cdp_session.return_value
+    assert cdp.send.await_count == 2
+
+@pytest.mark.asyncio
+async def test_malformed_snapshot_falls_back_to_evaluate(state_manager):
+    """Test that an unparseable snapshot drops the session and uses the DOM walk"""
+    page = make_snapshot_page([])
+    cdp = page.context.new_cdp_session.return_value
+    cdp.send.return_value = {"strings": [], "documents": []}
+    page.evaluate.return_value = {
+        "title": "Example",
+        "viewport": {"width": 1280, "height": 720},
+        "tagNames": ["BUTTON"],
+        "tags": [0],
+        "ids": ["ok"],
+        "texts": ["OK"],
+        "selectors": ["#ok"]
+    }
+
+    state = await state_manager.capture_state(page)
+    assert state is not None
+    assert state.tags == ["BUTTON"]
+    cdp.detach.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_memory_management(state_manager):
+    """Test that many concurrent captures keep state history bounded"""
+    pages = [make_snapshot_page([("BODY", -1, None, "visible", "1")]) for _ in range(2 * STATE_HISTORY_SIZE)]
+
+    states = await asyncio.gather(*(state_manager.capture_state(page) for page in pages))
+    assert all(state is not None for state in states)
+    assert len(state_manager.state_history) == STATE_HISTORY_SIZE
+    assert state_manager.state_history[-1] is states[-1]
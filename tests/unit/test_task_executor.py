@@ -1,9 +1,10 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from datetime import datetime
+from urllib.parse import urlparse
 
 from src.actions.action_cache import Action, ActionSequence
-from src.task.executor import TaskExecutor, GUIState
+from src.task.executor import TaskExecutor, _normalize_url
 
 @pytest.fixture
 def mock_page():
@@ -116,4 +117,20 @@ async def test_execute_request_no_actions(browser_manager, action_cache, claude_
     
     assert success is False
     action_cache.store_sequence.assert_not_awaited()
-    browser_manager.get_active_page.assert_awaited_once() 
\ No newline at end of file
+    browser_manager.get_active_page.assert_awaited_once() 
+
+@pytest.mark.parametrize("url", [
+    "https://Example.com/a/b?q=1#top",
+    "HTTP://example.com",
+    "http://example.com/b;params",
+    "http://example.com/a;x/b",
+    "http://example.com/b\n",
+    "  http://example.com/b",
+    "http://[::1]:8080/path",
+    "about:blank",
+    "mailto:user@example.com",
+])
+def test_normalize_url_matches_urlparse(url):
+    """Test that the regex fast path reduces URLs exactly like urlparse"""
+    parsed = urlparse(url)
+    assert _normalize_url(url) == f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
@@ -0,0 +1,163 @@
+import asyncio
+import sys
+import types
+import pytest
+
+# config.settings comes from the deployment, stub the values TaskManager reads
+if "config.settings" not in sys.modules:
+    _settings = types.ModuleType("config.settings")
+    _settings.config = types.SimpleNamespace(
+        task=types.SimpleNamespace(max_concurrent_tasks=2, default_timeout=5)
+    )
+    sys.modules.setdefault("config", types.ModuleType("config"))
+    sys.modules["config.settings"] = _settings
+
+from src.task.task_manager import TaskManager, TaskStatus
+
+async def drain(manager):
+    """Pop every queued task id in dispatch order"""
+    order = []
+    while not manager.task_queue.empty():
+        _, _, task_id = await manager.task_queue.get()
+        order.append(task_id)
+    return order
+
+@pytest.fixture
+def task_manager():
+    """Create task manager with a no-op handler for the 'test' type"""
+    manager = TaskManager()
+
+    async def handler(task):
+        pass
+
+    manager.register_handler("test", handler)
+    return manager
+
+@pytest.mark.asyncio
+async def test_queue_priority_then_fifo(task_manager):
+    """Test that lower priorities run first and equal priorities keep creation order"""
+    low_a = await task_manager.create_task("low a", "test", priority=1)
+    high = await task_manager.create_task("high", "test", priority=0)
+    low_b = await task_manager.create_task("low b", "test", priority=1)
+
+    assert await drain(task_manager) == [high, low_a, low_b]
+
+@pytest.mark.asyncio
+async def test_failed_task_is_requeued(task_manager):
+    """Test that a failing task goes back on the queue until retries run out"""
+    async def failing(task):
+        raise RuntimeError("boom")
+
+    task_manager.register_handler("flaky", failing)
+    task_id = await task_manager.create_task("flaky", "flaky", max_retries=1)
+    await drain(task_manager)
+
+    await task_manager.start_task(task_id)
+    task = task_manager.get_task(task_id)
+    assert task.status == TaskStatus.PENDING
+    assert task.retry_count == 1
+    assert await drain(task_manager) == [task_id]
+
+    await task_manager.start_task(task_id)
+    assert task.status == TaskStatus.FAILED
+    assert task_manager.task_queue.empty()
+
+@pytest.mark.asyncio
+async def test_subtasks_queued_after_parent_completes(task_manager):
+    """Test that subtasks are only dispatched once their parent has finished"""
+    parent = await task_manager.create_task("parent", "test")
+    first = await task_manager.add_subtask(parent, "first", "test", priority=1)
+    second = await task_manager.add_subtask(parent, "second", "test", priority=0)
+    assert await drain(task_manager) == [parent]
+
+    await task_manager.start_task(parent)
+    assert task_manager.get_task(parent).status == TaskStatus.COMPLETED
+    assert await drain(task_manager) == [second, first]
+
+@pytest.mark.asyncio
+async def test_cancel_cascades_to_subtasks(task_manager):
+    """Test that cancelling a task cancels its whole subtree"""
+    parent = await task_manager.create_task("parent", "test")
+    child = await task_manager.add_subtask(parent, "child", "test")
+    grandchild = await task_manager.add_subtask(child, "grandchild", "test")
+
+    await task_manager.cancel_task(parent)
+
+    cancelled = task_manager.list_tasks(TaskStatus.CANCELLED)
+    assert [task.id for task in cancelled] == [parent, child, grandchild]
+    assert task_manager.list_tasks(TaskStatus.PENDING) == []
+
+@pytest.mark.asyncio
+async def test_clear_completed_tasks(task_manager):
+    """Test that completed and failed tasks are removed and pending ones kept"""
+    async def failing(task):
+        raise RuntimeError("boom")
+
+    task_manager.register_handler("broken", failing)
+    done = await task_manager.create_task("done", "test")
+    failed = await task_manager.create_task("failed", "broken", max_retries=0)
+    pending = await task_manager.create_task("pending", "test")
+    await task_manager.start_task(done)
+    await task_manager.start_task(failed)
+
+    task_manager.clear_completed_tasks()
+
+    assert set(task_manager.tasks) == {pending}
+    assert task_manager.list_tasks(TaskStatus.COMPLETED) == []
+    assert task_manager.list_tasks(TaskStatus.FAILED) == []
+
+@pytest.mark.asyncio
+async def test_workers_respect_concurrency_limit(task_manager):
+    """Test that queue workers run every task without exceeding max_concurrent_tasks"""
+    running = 0
+    peak = 0
+
+    async def slow(task):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    task_manager.register_handler("slow", slow)
+    ids = [await task_manager.create_task(str(i), "slow") for i in range(6)]
+
+    runner = asyncio.create_task(task_manager.run())
+    while len(task_manager.list_tasks(TaskStatus.COMPLETED)) < len(ids):
+        await asyncio.sleep(0.01)
+    runner.cancel()
+
+    assert peak == task_manager.max_concurrent_tasks
+    assert [task.id for task in task_manager.list_tasks(TaskStatus.COMPLETED)] == ids
+
+@pytest.mark.asyncio
+async def test_start_task_enforces_concurrency_limit(task_manager):
+    """Test that direct callers cannot start more than max_concurrent_tasks"""
+    release = asyncio.Event()
+
+    async def blocking(task):
+        await release.wait()
+
+    task_manager.register_handler("blocking", blocking)
+    ids = [await task_manager.create_task(str(i), "blocking") for i in range(3)]
+    started = [asyncio.create_task(task_manager.start_task(task_id)) for task_id in ids]
+    await asyncio.sleep(0)
+
+    assert len(task_manager.running_tasks) == task_manager.max_concurrent_tasks
+    release.set()
+    await asyncio.gather(*started)
+    assert task_manager.get_task(ids[-1]).status == TaskStatus.PENDING
+
+@pytest.mark.asyncio
+async def test_task_tree(task_manager):
+    """Test that the task tree nests subtasks in order"""
+    parent = await task_manager.create_task("parent", "test")
+    child = await task_manager.add_subtask(parent, "child", "test")
+    await task_manager.add_subtask(child, "grandchild", "test")
+    await task_manager.add_subtask(parent, "sibling", "test")
+
+    tree = task_manager.get_task_tree(parent)
+    assert tree["description"] == "parent"
+    assert [sub["description"] for sub in tree["subtasks"]] == ["child", "sibling"]
+    assert tree["subtasks"][0]["subtasks"][0]["description"] == "grandchild"
+    assert tree["status"] == "pending"